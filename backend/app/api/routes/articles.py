@@ -15,7 +15,7 @@ from sqlalchemy import select
 
 from app.core.database import get_db
 from app.services.article_generator import ArticleGenerator
-from app.services.ollama_client import OllamaClient
+from app.services.ollama_client import ollama_client
 from app.services.document_processor import DocumentProcessingPipeline
 from app.schemas.articles import ArticleRequest, ArticleResponse, OutlineRequest
 from app.models.knowledge_base import KBCollection, Article, ArticleStatus
@@ -24,7 +24,6 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 # Initialize services
-ollama_client = OllamaClient()
 doc_processor = DocumentProcessingPipeline()
 
 async def get_article_generator(db: AsyncSession) -> ArticleGenerator:
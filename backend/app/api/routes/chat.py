@@ -8,15 +8,18 @@ import logging
 from typing import Dict, List, Optional, Any, AsyncGenerator
 from datetime import datetime
 
+import msgspec
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel, Field
+from pydantic import BaseModel
 
 from app.core.database import get_db
 from app.services.pydantic_agents_simple import PydanticAgentOrchestrator, AgentResponse
+from app.services.pydantic_agents_models import response_to_dict
 from app.services.vector_store import MilvusVectorStore
-from app.services.ollama_client import OllamaClient
+from app.services.ollama_client import ollama_client as shared_ollama_client
 from app.services.article_generator import ArticleGenerator
+from app.services.document_processor import processing_pipeline
 
 logger = logging.getLogger(__name__)
 
@@ -53,14 +56,17 @@ class ResearchRequest(BaseModel):
     session_id: str
 
 
-class StreamEvent(BaseModel):
-    """Streaming event"""
+class StreamEvent(msgspec.Struct):
+    """Streaming event, encoded with msgspec so payloads are serialized once, straight to JSON"""
     event_type: str
     data: Any
-    timestamp: datetime = Field(default_factory=datetime.now)
+    timestamp: datetime = msgspec.field(default_factory=datetime.now)
     session_id: Optional[str] = None
 
 
+_event_encoder = msgspec.json.Encoder()
+
+
 # In-memory session storage (in production, use Redis or database)
 chat_sessions: Dict[str, Dict[str, Any]] = {}
 
@@ -71,22 +77,24 @@ def get_vector_store():
 
 
 def get_ollama_client():
-    """Get Ollama client instance"""
-    return OllamaClient()
+    """Get the shared Ollama client instance"""
+    return shared_ollama_client
 
 
 async def create_chat_session(session_id: str, collection_id: int) -> str:
     """Create a new chat session"""
     
     # Initialize dependencies
-    vector_store = get_vector_store()
     ollama_client = get_ollama_client()
     
     # Create orchestrator
     orchestrator = PydanticAgentOrchestrator(
         collection_id=collection_id,
-        search_function=vector_store.search_documents,
-        llm_function=ollama_client.generate_text
+        search_function=processing_pipeline.search_similar_content,
+        search_function_batch=processing_pipeline.search_similar_content_batch,
+        llm_function=ollama_client.generate_text,
+        llm_stream_function=ollama_client.generate_text_stream,
+        model_name_function=ollama_client.get_user_llm_model
     )
     
     # Store session
@@ -111,7 +119,7 @@ async def format_stream_event(event_type: str, data: Any, session_id: str = None
         data=data,
         session_id=session_id
     )
-    return f"data: {event.model_dump_json()}\n\n"
+    return f"data: {_event_encoder.encode(event).decode()}\n\n"
 
 
 async def stream_agent_response(
@@ -132,7 +140,13 @@ async def stream_agent_response(
         if workflow_type == "research":
             result = await orchestrator.start_research_workflow(**kwargs)
         elif workflow_type == "outline":
-            result = await orchestrator.create_outline_workflow(**kwargs)
+            # Forward outline text as it is generated instead of waiting for the whole outline
+            result = None
+            async for result in orchestrator.create_outline_workflow_stream(**kwargs):
+                if result.status == "partial":
+                    yield await format_stream_event("outline_partial", {
+                        "chunk": result.data["outline_partial"]
+                    }, session_id)
         elif workflow_type == "feedback":
             result = await orchestrator.handle_user_feedback_workflow(**kwargs)
         else:
@@ -141,7 +155,7 @@ async def stream_agent_response(
         # Stream the response
         yield await format_stream_event("agent_response", {
             "workflow_type": workflow_type,
-            "result": result.model_dump() if hasattr(result, 'model_dump') else result,
+            "result": response_to_dict(result),
             "status": "completed"
         }, session_id)
         
@@ -9,6 +9,7 @@ import asyncio
 
 import structlog
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, update
 
@@ -23,7 +24,7 @@ from app.schemas.knowledge_base import (
 )
 from app.schemas.articles import ArticleResponse
 from app.services.article_generator import ArticleGenerator
-from app.services.ollama_client import OllamaClient
+from app.services.ollama_client import ollama_client
 from app.services.document_processor import DocumentProcessingPipeline
 from app.models.settings import Setting
 from datetime import datetime
@@ -70,7 +71,6 @@ async def get_user_llm_model(db: AsyncSession) -> str:
             return llm_setting.model_name
         else:
             # Default fallback - check what models are available
-            ollama_client = OllamaClient()
             if await ollama_client.check_model_availability("gpt-oss:20b"):
                 return "gpt-oss:20b"  # Smaller, faster model
             else:
@@ -97,9 +97,6 @@ async def generate_article_content(collection_id: int, article_id: int, article_
             user_model = await get_user_llm_model(db)
             logger.info(f"Using LLM model: {user_model}")
             
-            # Initialize Ollama client
-            ollama_client = OllamaClient()
-            
             # Update progress
             generated_articles[collection_id][article_id]["progress"] = f"Generating article with {user_model}..."
             
@@ -201,7 +198,6 @@ async def create_collection(
     # Get user's configured embedding model if not specified
     embedding_model = collection_data.embedding_model
     if not embedding_model:
-        ollama_client = OllamaClient()
         try:
             embedding_model = await ollama_client.get_user_embedding_model(db)
             logger.info(f"Using user's configured embedding model: {embedding_model}")
@@ -704,7 +700,7 @@ async def get_document_processing_status(
     }
 
 
-@router.post("/{collection_id}/search/", response_model=dict)
+@router.post("/{collection_id}/search/", response_model=dict, response_class=ORJSONResponse)
 async def search_documents(
     collection_id: int,
     search_request: SearchRequest,
@@ -797,20 +793,25 @@ async def reprocess_collection_documents(
         # Initialize document processor
         doc_processor = DocumentProcessingPipeline()
 
-        # Reprocess each document
+        # Reprocess documents in parallel; reprocessing doesn't use this request's session
+        results = await doc_processor.process_documents(
+            [
+                {
+                    "document_id": document.id,
+                    "collection_id": collection_id,
+                    "file_path": document.file_path,
+                    "mime_type": document.mime_type
+                }
+                for document in documents
+            ],
+            reprocess=True
+        )
         reprocessed_count = 0
-        for document in documents:
-            try:
-                logger.info(f"Reprocessing document {document.id}: {document.original_filename}")
-                await doc_processor.reprocess_document(
-                    document_id=document.id,
-                    collection_id=collection_id,
-                    file_path=document.file_path,
-                    mime_type=document.mime_type
-                )
+        for document, outcome in zip(documents, results):
+            if isinstance(outcome, BaseException):
+                logger.error(f"Failed to reprocess document {document.id}: {outcome}")
+            else:
                 reprocessed_count += 1
-            except Exception as e:
-                logger.error(f"Failed to reprocess document {document.id}: {e}")
 
         # Update collection counters
         await _update_collection_counters(collection_id, db)
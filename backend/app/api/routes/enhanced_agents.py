@@ -24,7 +24,7 @@ from app.services.simplified_enhanced_agents import (
     ArticleFeedback,
     GenerationState
 )
-from app.services.ollama_client import OllamaClient
+from app.services.ollama_client import ollama_client
 from app.services.document_processor import DocumentProcessingPipeline
 from app.services.web_search import WebSearchManager
 from app.models.knowledge_base import KBCollection, Article, ArticleStatus
@@ -34,7 +34,6 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 # Initialize services
-ollama_client = OllamaClient()
 doc_processor = DocumentProcessingPipeline()
 
 # Global orchestrator instances (in production, use proper session management)
@@ -227,6 +226,29 @@ async def generate_section(
         raise HTTPException(status_code=500, detail=f"Section generation failed: {str(e)}")
 
 
+@router.post("/{collection_id}/sessions/{session_id}/sections/generate-all")
+async def generate_all_sections(
+    collection_id: int,
+    session_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """Generate content for every outlined section concurrently"""
+    try:
+        orchestrator = await get_orchestrator(collection_id, db)
+        
+        sections_result = await orchestrator.generate_all_sections(session_id)
+        
+        return {
+            "status": "success",
+            "sections_result": sections_result,
+            "next_action": sections_result.get("action_needed", "unknown")
+        }
+        
+    except Exception as e:
+        logger.error(f"Section generation failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Section generation failed: {str(e)}")
+
+
 @router.post("/{collection_id}/sessions/{session_id}/sections/{section_id}/feedback")
 async def provide_section_feedback(
     collection_id: int,
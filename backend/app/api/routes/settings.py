@@ -12,7 +12,8 @@ from sqlalchemy import select, delete
 from pydantic import BaseModel
 
 from app.core.database import get_db
-from app.services.ollama_client import OllamaClient
+from app.services.ollama_client import ollama_client
+from app.services.pydantic_agents_simple import clear_llm_response_cache
 from app.models.settings import Setting
 
 logger = structlog.get_logger(__name__)
@@ -182,6 +183,8 @@ async def save_settings_config(request: SettingsRequest, db: AsyncSession = Depe
             db.add(ui_setting)
         
         await db.commit()
+        ollama_client.invalidate_model_cache()
+        clear_llm_response_cache()
         return {"message": "Settings saved successfully"}
         
     except Exception as e:
@@ -435,7 +438,6 @@ async def test_search_connection(request: SearchTestRequest) -> Dict[str, Any]:
 async def list_ollama_models():
     """List all available Ollama models"""
     try:
-        ollama_client = OllamaClient()
         models = await ollama_client.list_models()
         return {
             "status": "success",
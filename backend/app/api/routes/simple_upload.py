@@ -13,6 +13,7 @@ from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core import database
 from app.core.database import get_db
 from app.models.knowledge_base import KBCollection
 from app.services.simple_document_processor import SimpleDocumentProcessor
@@ -58,19 +59,22 @@ async def upload_documents_simple(
                     temp_file.write(content)
                     temp_file_path = Path(temp_file.name)
                 
-                # Process the document
-                result = await processor.process_document(
-                    file_path=temp_file_path,
-                    collection_id=collection_id,
-                    db=db,
-                    original_filename=upload_file.filename
-                )
+                # Process the document in its own savepoint; a failure only rolls back this file
+                try:
+                    async with db.begin_nested():
+                        result = await processor.process_document(
+                            file_path=temp_file_path,
+                            collection_id=collection_id,
+                            db=db,
+                            original_filename=upload_file.filename,
+                            commit=False
+                        )
+                finally:
+                    # Cleanup temp file
+                    temp_file_path.unlink(missing_ok=True)
                 
                 results.append(result)
                 
-                # Cleanup temp file
-                temp_file_path.unlink(missing_ok=True)
-                
             except Exception as e:
                 logger.error(f"Failed to process {upload_file.filename}: {e}")
                 results.append({
@@ -79,6 +83,9 @@ async def upload_documents_simple(
                     "filename": upload_file.filename
                 })
         
+        # One commit for the whole batch
+        await db.commit()
+        
         # Summary
         successful = [r for r in results if r["success"] and not r.get("skipped")]
         failed = [r for r in results if not r["success"]]
@@ -301,7 +308,7 @@ async def upload_folder_simple(
             results = await processor.process_multiple_documents(
                 file_paths=file_paths,
                 collection_id=collection_id,
-                db=db
+                session_factory=database.async_session_factory
             )
             
             return {
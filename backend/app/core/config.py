@@ -4,7 +4,7 @@ Configuration management using Pydantic Settings
 
 import os
 from functools import lru_cache
-from typing import Optional
+from typing import Any, Dict, Literal, Optional
 
 from pydantic import Field
 from pydantic_settings import BaseSettings
@@ -32,16 +32,40 @@ class Settings(BaseSettings):
     OLLAMA_HOST: str = Field(default="localhost", description="Ollama host")
     OLLAMA_PORT: int = Field(default=11434, description="Ollama port")
     OLLAMA_BASE_URL: Optional[str] = Field(default=None, description="Full Ollama base URL")
+    OLLAMA_EMBED_BATCH_SIZE: int = Field(default=32, description="Texts per api/embed request (32 suits CPU/MPS, raise to ~128 on GPU)")
+    OLLAMA_EMBED_CONCURRENCY: int = Field(default=8, description="Concurrent per-text embedding requests when batch embedding is unavailable")
+    OLLAMA_KEEP_ALIVE: str = Field(default="30m", description="How long Ollama keeps a model loaded after each request (e.g. 30m, -1 for forever)")
+    # Generation tuning: set OLLAMA_NUM_THREAD to the number of physical cores on CPU-only hosts
+    # (unset lets Ollama decide); raise OLLAMA_NUM_CTX for long articles at the cost of memory
+    OLLAMA_NUM_THREAD: Optional[int] = Field(default=None, description="CPU threads per generation request (unset for Ollama's default)")
+    OLLAMA_NUM_CTX: int = Field(default=4096, description="Context window in tokens for text generation")
+    OLLAMA_MODEL_OPTIONS: Dict[str, Dict[str, Any]] = Field(
+        default_factory=dict,
+        description='Per-model option overrides as JSON, e.g. {"qwen3:32b": {"num_ctx": 16384}}'
+    )
     
     # Default Models
     DEFAULT_LLM_MODEL: str = Field(default="llama3.1:8b", description="Default LLM model")
+    LLM_MAX_CONCURRENCY: int = Field(default=4, description="LLM calls the agent workflows may have in flight at once, across all sessions")
+    AGENT_MAX_CONCURRENCY: int = Field(default=8, description="pydantic-ai agent runs in flight at once, across all sessions; LLM calls made inside them are further capped by LLM_MAX_CONCURRENCY")
     DEFAULT_EMBEDDING_MODEL: str = Field(default="nomic-embed-text", description="Default embedding model")
+    SEMANTIC_CACHE_THRESHOLD: float = Field(default=0.87, description="Cosine similarity at which an agent prompt reuses a cached LLM response")
+    SEMANTIC_CACHE_MAX_ENTRIES: int = Field(default=512, description="Responses the semantic LLM cache keeps per orchestrator and max_tokens value (0 disables it)")
     
     # File Storage
     UPLOAD_DIR: str = Field(default="uploads", description="Upload directory")
     EXPORT_DIR: str = Field(default="exports", description="Export directory")
     MAX_FILE_SIZE: int = Field(default=100 * 1024 * 1024, description="Max file size in bytes (100MB)")
     
+    OLLAMA_EMBED_CACHE_QUANT: Literal["none", "fp16", "int8"] = Field(
+        default="none",
+        description="Storage format for cached embeddings: float32, fp16 (half size), or int8 (quarter size)"
+    )
+    EMBEDDING_CACHE_DIR: Optional[str] = Field(
+        default="~/.cache/lawriter/embeddings",
+        description="Directory for the persistent embedding cache (empty to disable)"
+    )
+    
     # Document Processing
     CHUNK_SIZE: int = Field(default=1000, description="Default chunk size for documents")
     CHUNK_OVERLAP: int = Field(default=200, description="Chunk overlap size")
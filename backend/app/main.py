@@ -3,6 +3,7 @@ Long Article Writer - FastAPI Backend
 Main application entry point
 """
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
@@ -16,7 +17,12 @@ from sentry_sdk.integrations.fastapi import FastApiIntegration
 from sentry_sdk.integrations.sqlalchemy import SqlalchemyIntegration
 
 from app.core.config import get_settings
+from app.core import database
 from app.core.database import init_db
+from app.services.ollama_client import ollama_client
+from app.services.enhanced_pydantic_agents import close_shared_http_client
+from app.services.simple_document_processor import SimpleDocumentProcessor
+from app.services.vector_store import vector_store
 from app.api import api_router
 
 # Configure structured logging
@@ -40,6 +46,25 @@ structlog.configure(
 logger = structlog.get_logger(__name__)
 
 
+async def warm_up_models() -> None:
+    """Load the configured models so the first user request doesn't pay the cold-load stall"""
+    try:
+        async with database.async_session_factory() as db:
+            embedding_model = await ollama_client.get_user_embedding_model(db)
+            llm_model = await ollama_client.get_user_llm_model(db)
+        results = await asyncio.gather(
+            ollama_client.warmup(embedding_model, embedding=True),
+            ollama_client.warmup(llm_model),
+            return_exceptions=True
+        )
+    except Exception as e:
+        logger.warning("Model warmup failed", error=str(e))
+        return
+    for model, result in zip((embedding_model, llm_model), results):
+        if isinstance(result, Exception):
+            logger.warning("Model warmup failed", model=model, error=str(result))
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Application lifespan management"""
@@ -66,10 +91,28 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         logger.error("Failed to initialize database", error=str(e))
         raise
     
+    # Warm up models in the background so a cold or missing model doesn't hold startup
+    warmup_task = asyncio.create_task(warm_up_models())
+    
+    # Connect to Milvus once; requests reuse the connection instead of reconnecting
+    try:
+        await vector_store.connect()
+    except Exception as e:
+        logger.warning("Milvus connection failed, will retry on first use", error=str(e))
+    
     logger.info("Application startup complete")
     
     yield
     
+    warmup_task.cancel()
+    try:
+        await warmup_task
+    except asyncio.CancelledError:
+        pass
+    await ollama_client.aclose()
+    await close_shared_http_client()
+    await SimpleDocumentProcessor.close()
+    await vector_store.disconnect()
     logger.info("Application shutdown")
 
 
@@ -157,5 +200,6 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=settings.DEBUG,
+        loop="uvloop",
         log_level="info"
     )
\ No newline at end of file
@@ -5,10 +5,13 @@ Document processing pipeline that coordinates text extraction, chunking, and emb
 import asyncio
 import json
 import logging
-from typing import List, Dict, Any, Optional
+import time
+from itertools import islice
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
 
+import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.services.text_processing import document_analyzer, TextChunk
 from app.services.ollama_client import ollama_client
@@ -23,11 +26,58 @@ class ProcessingError(Exception):
     pass
 
 
+def _build_chunks_data(
+    valid_chunks_and_embeddings: List[Tuple[TextChunk, np.ndarray]],
+    document_id: int,
+    collection_id: int,
+    processing_time_iso: str
+) -> List[Dict[str, Any]]:
+    """Build the vector store payload for each chunk (synchronous, run in a worker thread)"""
+    chunks_data = []
+    for chunk, embedding in valid_chunks_and_embeddings:
+        chunks_data.append({
+            "chunk_id": chunk.id if hasattr(chunk, 'id') and chunk.id else (document_id * 1000 + chunk.chunk_index),  # Use actual chunk ID or generate one
+            "document_id": document_id,
+            "collection_id": collection_id,  # Fix: use collection_id parameter, not document.collection_id
+            "chunk_index": chunk.chunk_index,
+            "text": chunk.text,
+            "char_count": chunk.char_count,
+            "embedding": embedding,
+            "metadata": json.dumps({
+                "start_pos": chunk.start_pos,
+                "end_pos": chunk.end_pos,
+                "hash": chunk.hash,
+                "processing_time": processing_time_iso
+            })
+        })
+    return chunks_data
+
+
+def _build_chunk_previews(
+    valid_chunks_and_embeddings: List[Tuple[TextChunk, np.ndarray]],
+    milvus_ids: List[str]
+) -> List[Dict[str, Any]]:
+    """Build the per-chunk preview list returned in processing results"""
+    previews = []
+    milvus_id_count = len(milvus_ids)
+    for i, (chunk, embedding) in enumerate(valid_chunks_and_embeddings):
+        text = chunk.text
+        previews.append({
+            "index": chunk.chunk_index,
+            "text_preview": f"{text[:100]}..." if len(text) > 100 else text,
+            "char_count": chunk.char_count,
+            "has_embedding": len(embedding) > 0,
+            "milvus_id": milvus_ids[i] if i < milvus_id_count else None
+        })
+    return previews
+
+
 class DocumentProcessingPipeline:
     """Complete document processing pipeline"""
     
-    def __init__(self):
+    def __init__(self, embedding_batch_size: int = 64):
         self.default_embedding_model = "nomic-embed-text"
+        self.embedding_batch_size = embedding_batch_size  # Chunks held in memory per embedding round
     
     async def process_document(
         self,
@@ -46,58 +96,17 @@ class DocumentProcessingPipeline:
         """
         embedding_model = embedding_model or self.default_embedding_model
         
-        processing_start = datetime.now()
+        processing_start = time.perf_counter()
+        processing_time_iso = datetime.now().isoformat()  # Wall-clock stamp for chunk metadata
+        milvus_ids = []
+        sql_chunks_stored = 0
         
         try:
             logger.info(f"Starting document processing for document {document_id}")
             
-            # Step 1: Extract and chunk text
+            # Step 1: Extract text; chunks are produced lazily, so no chunk list is built
             logger.info("Step 1: Extracting and chunking text")
-            full_text, chunks = await document_analyzer.analyze_document(file_path, mime_type)
-            
-            if not chunks:
-                raise ProcessingError("No chunks created from document")
-            
-            logger.info(f"Created {len(chunks)} chunks from document")
-            
-            # Step 2: Generate embeddings
-            logger.info("Step 2: Generating embeddings")
-            chunk_texts = [chunk.text for chunk in chunks]
-            embeddings = await ollama_client.generate_embeddings_batch(chunk_texts, embedding_model)
-            
-            # Filter out failed embeddings
-            valid_chunks_and_embeddings = [
-                (chunk, embedding) for chunk, embedding in zip(chunks, embeddings) 
-                if embedding  # Only keep non-empty embeddings
-            ]
-            
-            if not valid_chunks_and_embeddings:
-                raise ProcessingError("Failed to generate any valid embeddings")
-            
-            logger.info(f"Generated {len(valid_chunks_and_embeddings)} valid embeddings")
-            
-            # Step 3: Store in vector database
-            logger.info("Step 3: Storing embeddings in vector database")
-            
-            # Prepare data for vector store
-            chunks_data = []
-            for i, (chunk, embedding) in enumerate(valid_chunks_and_embeddings):
-                chunk_data = {
-                    "chunk_id": chunk.id if hasattr(chunk, 'id') and chunk.id else (document_id * 1000 + chunk.chunk_index),  # Use actual chunk ID or generate one
-                    "document_id": document_id,
-                    "collection_id": collection_id,  # Fix: use collection_id parameter, not document.collection_id
-                    "chunk_index": chunk.chunk_index,
-                    "text": chunk.text,
-                    "char_count": chunk.char_count,
-                    "embedding": embedding,
-                    "metadata": json.dumps({
-                        "start_pos": chunk.start_pos,
-                        "end_pos": chunk.end_pos,
-                        "hash": chunk.hash,
-                        "processing_time": processing_start.isoformat()
-                    })
-                }
-                chunks_data.append(chunk_data)
+            full_text_length, chunk_iter = await document_analyzer.stream_document(file_path, mime_type)
             
             # Connect to vector store if not already connected
             try:
@@ -106,61 +115,74 @@ class DocumentProcessingPipeline:
                 logger.warning(f"Vector store connection failed: {e}")
                 # Continue without vector storage for now
             
-            # Store embeddings
-            milvus_ids = []
-            try:
-                milvus_ids = await vector_store.store_embeddings(collection_id, chunks_data)
-                logger.info(f"Stored {len(milvus_ids)} embeddings in Milvus")
-            except Exception as e:
-                logger.warning(f"Vector storage failed: {e}")
-                # Continue without vector storage
-            
-            # Step 3.5: Store chunks in SQL database
-            logger.info("Step 3.5: Storing chunks in SQL database")
-            sql_chunks_stored = 0
-            if db:
-                try:
-                    from app.models.knowledge_base import KBChunk
-                    
-                    # Store chunks in SQL database
-                    for i, (chunk, embedding) in enumerate(valid_chunks_and_embeddings):
-                        milvus_id = milvus_ids[i] if i < len(milvus_ids) else None
-                        
-                        sql_chunk = KBChunk(
-                            document_id=document_id,
-                            chunk_index=chunk.chunk_index,
-                            text=chunk.text,
-                            # char_count is auto-generated by MySQL based on text length
-                            milvus_id=str(milvus_id) if milvus_id else None
-                        )
-                        db.add(sql_chunk)
-                    
-                    await db.flush()  # Save all chunks
-                    sql_chunks_stored = len(valid_chunks_and_embeddings)
-                    logger.info(f"Stored {sql_chunks_stored} chunks in SQL database")
-                    
-                except Exception as e:
-                    logger.warning(f"SQL chunk storage failed: {e}")
-                    # Continue without SQL storage
-            else:
+            if not db:
                 logger.warning("No database session provided, skipping SQL chunk storage")
             
+            # Steps 2-3: Embed each sub-batch of chunks and store it before reading the next,
+            # so only one batch of chunk texts and embeddings is alive at a time
+            logger.info("Steps 2-3: Generating and storing embeddings batch by batch")
+            total_chunks = 0
+            valid_chunks = 0
+            summary_chunks: List[TextChunk] = []
+            sql_db = db
+            chunk_previews = []
+            while True:
+                batch = list(islice(chunk_iter, self.embedding_batch_size))
+                if not batch:
+                    break
+                total_chunks += len(batch)
+                if len(summary_chunks) < 3:
+                    summary_chunks.extend(batch[:3 - len(summary_chunks)])
+                
+                # Repeated chunks are served by the client's embedding caches
+                embeddings, valid_mask = await ollama_client.generate_embeddings_array(
+                    [chunk.text for chunk in batch], embedding_model
+                )
+                
+                # Keep only chunks whose embedding succeeded
+                batch_pairs = [(batch[i], embeddings[i]) for i in np.flatnonzero(valid_mask)]
+                del batch, embeddings
+                if not batch_pairs:
+                    continue
+                valid_chunks += len(batch_pairs)
+                
+                batch_milvus_ids, batch_sql_stored = await self._store_batch(
+                    batch_pairs, document_id, collection_id, processing_time_iso, sql_db
+                )
+                milvus_ids.extend(batch_milvus_ids)
+                sql_chunks_stored += batch_sql_stored
+                if not batch_sql_stored:
+                    # A failed flush leaves the session unusable until rollback
+                    sql_db = None
+                chunk_previews.extend(_build_chunk_previews(batch_pairs, batch_milvus_ids))
+            
+            if not total_chunks:
+                raise ProcessingError("No chunks created from document")
+            
+            logger.info(f"Created {total_chunks} chunks from document")
+            
+            if not valid_chunks:
+                raise ProcessingError("Failed to generate any valid embeddings")
+            
+            logger.info(
+                f"Generated {valid_chunks} valid embeddings, stored {len(milvus_ids)} in Milvus "
+                f"and {sql_chunks_stored} chunks in SQL database"
+            )
+            
             # Step 4: Generate document summary and keywords
             logger.info("Step 4: Generating document summary and keywords")
             
             # Use first few chunks for summary (limit text length)
-            summary_text = " ".join([chunk.text for chunk in chunks[:3]])[:2000]
+            summary_text = " ".join(chunk.text for chunk in summary_chunks)[:2000]
             
             try:
-                summary = await ollama_client.summarize_text(summary_text)
-                keywords = await ollama_client.extract_keywords(summary_text)
+                summary, keywords = await ollama_client.summarize_and_extract_keywords(summary_text)
             except Exception as e:
                 logger.warning(f"Summary/keywords generation failed: {e}")
                 summary = "Summary not available"
                 keywords = []
             
-            processing_end = datetime.now()
-            processing_time = (processing_end - processing_start).total_seconds()
+            processing_time = time.perf_counter() - processing_start
             
             # Return processing results
             results = {
@@ -169,13 +191,13 @@ class DocumentProcessingPipeline:
                 "collection_id": collection_id,
                 "processing_time_seconds": processing_time,
                 "text_extraction": {
-                    "full_text_length": len(full_text),
-                    "total_chunks": len(chunks),
-                    "valid_chunks": len(valid_chunks_and_embeddings),
+                    "full_text_length": full_text_length,
+                    "total_chunks": total_chunks,
+                    "valid_chunks": valid_chunks,
                 },
                 "embeddings": {
                     "model": embedding_model,
-                    "generated_count": len(valid_chunks_and_embeddings),
+                    "generated_count": valid_chunks,
                     "stored_count": len(milvus_ids),
                     "milvus_ids": milvus_ids
                 },
@@ -184,16 +206,7 @@ class DocumentProcessingPipeline:
                     "summary": summary,
                     "keywords": keywords
                 },
-                "chunks": [
-                    {
-                        "index": chunk.chunk_index,
-                        "text_preview": chunk.text[:100] + "..." if len(chunk.text) > 100 else chunk.text,
-                        "char_count": chunk.char_count,
-                        "has_embedding": bool(embedding),
-                        "milvus_id": milvus_ids[i] if i < len(milvus_ids) else None
-                    }
-                    for i, (chunk, embedding) in enumerate(valid_chunks_and_embeddings)
-                ]
+                "chunks": chunk_previews
             }
             
             logger.info(f"Document processing completed successfully in {processing_time:.2f}s")
@@ -201,7 +214,8 @@ class DocumentProcessingPipeline:
             
         except Exception as e:
             logger.error(f"Document processing failed: {e}")
-            processing_time = (datetime.now() - processing_start).total_seconds()
+            await self._discard_stored_batches(document_id, collection_id, milvus_ids, sql_chunks_stored, db)
+            processing_time = time.perf_counter() - processing_start
             
             return {
                 "status": "failed",
@@ -212,6 +226,90 @@ class DocumentProcessingPipeline:
                 "error_type": type(e).__name__
             }
     
+    async def _store_batch(
+        self,
+        batch_pairs: List[Tuple[TextChunk, np.ndarray]],
+        document_id: int,
+        collection_id: int,
+        processing_time_iso: str,
+        db: Optional[AsyncSession]
+    ) -> Tuple[List[str], int]:
+        """
+        Store one batch of embedded chunks in Milvus and, given a session, the SQL database
+        
+        Storage failures are logged and the batch continues without that store.
+        
+        Returns:
+            Tuple of (milvus_ids, sql_chunks_stored)
+        """
+        # Prepare data for vector store off the event loop (JSON encoding is CPU-bound)
+        chunks_data = await asyncio.to_thread(
+            _build_chunks_data,
+            batch_pairs,
+            document_id,
+            collection_id,
+            processing_time_iso
+        )
+        
+        milvus_ids = []
+        try:
+            milvus_ids = await vector_store.store_embeddings(collection_id, chunks_data)
+        except Exception as e:
+            logger.warning(f"Vector storage failed: {e}")
+            # Continue without vector storage
+        del chunks_data
+        
+        if not db:
+            return milvus_ids, 0
+        
+        try:
+            from app.models.knowledge_base import KBChunk
+            
+            sql_chunks = []
+            for i, (chunk, embedding) in enumerate(batch_pairs):
+                milvus_id = milvus_ids[i] if i < len(milvus_ids) else None
+                sql_chunks.append(KBChunk(
+                    document_id=document_id,
+                    chunk_index=chunk.chunk_index,
+                    text=chunk.text,
+                    # char_count is auto-generated by MySQL based on text length
+                    milvus_id=str(milvus_id) if milvus_id else None
+                ))
+            db.add_all(sql_chunks)
+            await db.flush()
+            # The rows are written; drop them from the session so their text is released
+            for sql_chunk in sql_chunks:
+                db.expunge(sql_chunk)
+            return milvus_ids, len(sql_chunks)
+        
+        except Exception as e:
+            logger.warning(f"SQL chunk storage failed: {e}")
+            # Continue without SQL storage
+            return milvus_ids, 0
+    
+    async def _discard_stored_batches(
+        self,
+        document_id: int,
+        collection_id: int,
+        milvus_ids: List[str],
+        sql_chunks_stored: int,
+        db: Optional[AsyncSession]
+    ):
+        """Remove the batches a failed run already stored, so no partial document is left"""
+        if milvus_ids:
+            try:
+                await vector_store.delete_document_embeddings(collection_id, document_id)
+            except Exception as e:
+                logger.warning(f"Failed to clean up partial embeddings: {e}")
+        if sql_chunks_stored and db:
+            try:
+                from sqlalchemy import delete
+                from app.models.knowledge_base import KBChunk
+                
+                await db.execute(delete(KBChunk).where(KBChunk.document_id == document_id))
+            except Exception as e:
+                logger.warning(f"Failed to clean up partial SQL chunks: {e}")
+    
     async def reprocess_document(
         self,
         document_id: int,
@@ -239,7 +337,35 @@ class DocumentProcessingPipeline:
         except Exception as e:
             logger.error(f"Document reprocessing failed: {e}")
             raise ProcessingError(f"Reprocessing failed: {e}")
-    
+
+    async def process_documents(
+        self,
+        jobs: List[Dict[str, Any]],
+        concurrency: int = 4,
+        reprocess: bool = False
+    ) -> List[Any]:
+        """
+        Process several documents in parallel with bounded concurrency
+
+        Each job is a dict of process_document keyword arguments (reprocess_document
+        arguments with reprocess=True). Jobs must not share a database session,
+        since an AsyncSession is not safe for concurrent use.
+        Size concurrency to roughly min(OLLAMA_NUM_PARALLEL, Milvus capacity); beyond
+        that the extra documents only queue on the server side.
+
+        Returns:
+            Results in job order; a failed job yields its exception instead of a dict
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        process = self.reprocess_document if reprocess else self.process_document
+
+        async def _process_one(job: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await process(**job)
+
+        logger.info(f"Processing {len(jobs)} documents with concurrency {concurrency}")
+        return await asyncio.gather(*(_process_one(job) for job in jobs), return_exceptions=True)
+
     async def search_similar_content(
         self,
         collection_id: int,
@@ -264,16 +390,15 @@ class DocumentProcessingPipeline:
         try:
             logger.info(f"Searching for similar content in collection {collection_id}")
             
-            # Generate query embedding with timeout
-            import asyncio
-            query_embedding = await asyncio.wait_for(
-                ollama_client.generate_embedding(query_text, embedding_model),
-                timeout=30.0
+            # Generate query embedding and connect to vector store concurrently
+            query_embedding, _ = await asyncio.gather(
+                asyncio.wait_for(
+                    ollama_client.generate_embedding(query_text, embedding_model),
+                    timeout=30.0
+                ),
+                asyncio.wait_for(vector_store.ensure_connected(), timeout=5.0)
             )
-            
-            # Connect to vector store with timeout
-            await asyncio.wait_for(vector_store.connect(), timeout=5.0)
-            
+
             # Search for similar chunks with timeout
             results = await asyncio.wait_for(
                 vector_store.search_similar(collection_id, query_embedding, limit, score_threshold),
@@ -295,6 +420,64 @@ class DocumentProcessingPipeline:
             logger.error(f"Content search failed: {e}")
             raise ProcessingError(f"Search failed: {e}")
     
+    async def search_similar_content_batch(
+        self,
+        collection_id: int,
+        query_texts: List[str],
+        limit: int = 10,
+        score_threshold: float = 0.2,
+        embedding_model: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search several queries at once: one batched embedding call and one Milvus request
+        
+        Returns one result dict per query, shaped like search_similar_content's.
+        """
+        if not query_texts:
+            return []
+        embedding_model = embedding_model or self.default_embedding_model
+        
+        try:
+            logger.info(f"Searching {len(query_texts)} queries in collection {collection_id}")
+            
+            query_embeddings, _ = await asyncio.gather(
+                asyncio.wait_for(
+                    ollama_client.generate_embeddings_batch(query_texts, embedding_model),
+                    timeout=30.0
+                ),
+                asyncio.wait_for(vector_store.ensure_connected(), timeout=5.0)
+            )
+            
+            # Queries whose embedding failed get empty results rather than failing the batch
+            searchable = [i for i, embedding in enumerate(query_embeddings) if len(embedding)]
+            all_matches: List[List[Dict[str, Any]]] = [[] for _ in query_texts]
+            if searchable:
+                results = await asyncio.wait_for(
+                    vector_store.search_similar_batch(
+                        collection_id, [query_embeddings[i] for i in searchable], limit, score_threshold
+                    ),
+                    timeout=10.0
+                )
+                for i, matches in zip(searchable, results):
+                    all_matches[i] = matches
+            
+            return [
+                {
+                    "matches": matches,
+                    "total_matches": len(matches),
+                    "query": query_text,
+                    "collection_id": collection_id
+                }
+                for query_text, matches in zip(query_texts, all_matches)
+            ]
+            
+        except asyncio.TimeoutError as e:
+            logger.error(f"Batch content search timed out: {e}")
+            raise ProcessingError(f"Search failed: Milvus connection timed out")
+        except Exception as e:
+            logger.error(f"Batch content search failed: {e}")
+            raise ProcessingError(f"Search failed: {e}")
+    
     async def get_processing_status(self, document_id: int) -> Dict[str, Any]:
         """Get processing status for a document (placeholder for future async processing)"""
         
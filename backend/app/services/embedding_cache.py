@@ -0,0 +1,146 @@
+"""
+Persistent SQLite cache for embeddings, so re-indexing after a restart skips Ollama
+"""
+
+import logging
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBED_CACHE_QUANT_MODES = ("none", "fp16", "int8")
+
+
+def pack_embedding(embedding: np.ndarray, quant: str = "none") -> bytes:
+    """
+    Serialize an embedding for caching
+    
+    "fp16" halves the size; "int8" stores a float32 per-vector scale followed by
+    symmetric int8 values, a quarter of the float32 size.
+    """
+    vector = np.asarray(embedding, dtype=np.float32)
+    if quant == "fp16":
+        return vector.astype(np.float16).tobytes()
+    if quant == "int8":
+        scale = float(np.max(np.abs(vector))) / 127.0 if vector.size else 0.0
+        scale = scale or 1.0
+        quantized = np.round(vector / scale).astype(np.int8)
+        return np.float32(scale).tobytes() + quantized.tobytes()
+    return vector.tobytes()
+
+
+def unpack_embedding(blob: bytes, quant: str = "none") -> np.ndarray:
+    """Restore a float32 embedding from pack_embedding output"""
+    if quant == "fp16":
+        return np.frombuffer(blob, dtype=np.float16).astype(np.float32)
+    if quant == "int8":
+        scale = np.frombuffer(blob, dtype=np.float32, count=1)[0]
+        return np.frombuffer(blob, dtype=np.int8, offset=4).astype(np.float32) * scale
+    return np.frombuffer(blob, dtype=np.float32)
+
+
+class EmbeddingDiskCache:
+    """
+    Packed embedding vectors keyed by hash, one SQLite file per model and quantization mode
+
+    If the cache directory or a database file cannot be opened (e.g. a read-only home),
+    the cache disables itself and lookups miss, so embedding continues uncached.
+    """
+
+    def __init__(self, cache_dir: str, quant: str = "none"):
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.quant = quant
+        self._connections: Dict[str, sqlite3.Connection] = {}
+        self._lock = threading.Lock()
+        self._disabled = False
+
+    def _connect(self, model: str) -> Optional[sqlite3.Connection]:
+        """Open (or reuse) the SQLite file for a model, or None once disabled; call with the lock held"""
+        if self._disabled:
+            return None
+        conn = self._connections.get(model)
+        if conn is None:
+            try:
+                conn = self._open(model)
+            except (sqlite3.Error, OSError) as e:
+                self._disabled = True
+                logger.warning(f"Embedding disk cache disabled, cannot open it under {self.cache_dir}: {e}")
+                return None
+            self._connections[model] = conn
+        return conn
+
+    def _open(self, model: str) -> sqlite3.Connection:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        filename = re.sub(r"[^A-Za-z0-9_.-]", "_", model)
+        if self.quant != "none":
+            filename = f"{filename}.{self.quant}"
+        conn = sqlite3.connect(self.cache_dir / f"{filename}.sqlite", check_same_thread=False)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model_name TEXT NOT NULL, key BLOB NOT NULL, vec BLOB NOT NULL, "
+                "PRIMARY KEY (model_name, key))"
+            )
+        except sqlite3.Error:
+            conn.close()
+            raise
+        return conn
+
+    def get_many(self, model: str, keys: List[bytes]) -> Dict[bytes, bytes]:
+        """Look up several keys at once; missing keys are absent from the result"""
+        if not keys:
+            return {}
+        found = {}
+        try:
+            with self._lock:
+                conn = self._connect(model)
+                if conn is None:
+                    return found
+                # Stay well below SQLite's bound-parameter limit
+                for start in range(0, len(keys), 500):
+                    batch = keys[start:start + 500]
+                    rows = conn.execute(
+                        f"SELECT key, vec FROM embeddings WHERE model_name = ? AND key IN ({','.join('?' * len(batch))})",
+                        [model, *batch]
+                    ).fetchall()
+                    for key, blob in rows:
+                        found[key] = blob
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Embedding disk cache read failed: {e}")
+        return found
+
+    def get(self, model: str, key: bytes) -> Optional[bytes]:
+        return self.get_many(model, [key]).get(key)
+
+    def put_many(self, model: str, items: Dict[bytes, bytes]) -> None:
+        """Store several packed embeddings in one transaction"""
+        if not items:
+            return
+        try:
+            with self._lock:
+                conn = self._connect(model)
+                if conn is None:
+                    return
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO embeddings (model_name, key, vec) VALUES (?, ?, ?)",
+                        [(model, key, blob) for key, blob in items.items()]
+                    )
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Embedding disk cache write failed: {e}")
+
+    def put(self, model: str, key: bytes, blob: bytes) -> None:
+        self.put_many(model, {key: blob})
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._connections.values():
+                conn.close()
+            self._connections.clear()
@@ -3,16 +3,36 @@ Enhanced AI Agent orchestration using Pydantic AI for iterative article generati
 with section-by-section feedback loops and comprehensive refinement system
 """
 
+from __future__ import annotations
+
 import asyncio
-import json
+import hashlib
+import io
 import logging
-from typing import List, Dict, Any, Optional, Union, Literal
+import re
+import time
+from collections import OrderedDict, deque
+from collections.abc import MutableMapping
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Union, Literal, Tuple, Iterator, AsyncIterator, NamedTuple
 from datetime import datetime
-from dataclasses import dataclass
+from dataclasses import dataclass, field, asdict
+from functools import lru_cache
+from itertools import islice
 from enum import Enum
 
-from pydantic import BaseModel, Field
-from pydantic_ai import Agent, RunContext
+import httpx
+import msgspec
+import orjson
+from pydantic.main import BaseModel
+from pydantic.fields import Field, PrivateAttr, computed_field
+
+from app.core.config import get_settings
+from app.services.pydantic_agents import get_llm_semaphore
+from app.services.pydantic_agents_models import monotonic_ns_to_datetime
+
+if TYPE_CHECKING:
+    from pydantic_ai import Agent, RunContext
+    from pydantic_ai.models.ollama import OllamaModel
 
 logger = logging.getLogger(__name__)
 
@@ -44,24 +64,56 @@ class AgentResponse(BaseModel):
     message: str = ""
     agent_type: str = ""
     phase: GenerationPhase
-    timestamp: datetime = Field(default_factory=datetime.now)
+    timestamp_ns: int = Field(default_factory=time.monotonic_ns)
     requires_feedback: bool = False
     suggestions: List[str] = []
+    
+    @computed_field
+    @property
+    def timestamp(self) -> str:
+        return monotonic_ns_to_datetime(self.timestamp_ns).isoformat()
+
+
+class FeedbackRecord(NamedTuple):
+    """Immutable feedback history entry"""
+    section_id: str
+    feedback_type: FeedbackType
+    feedback_text: str
+    specific_changes: Optional[str]
+    priority: str
+    timestamp_ns: int
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {**self._asdict(), "timestamp": monotonic_ns_to_datetime(self.timestamp_ns).isoformat()}
 
 
-class SectionContent(BaseModel):
+@dataclass(slots=True)
+class SectionContent:
     """Individual section content with metadata"""
     section_id: str
     title: str
     content: str
     word_count: int
     status: Literal["draft", "approved", "needs_revision"] = "draft"
-    feedback_history: List[Dict[str, Any]] = []
-    sources_used: List[str] = []
+    feedback_history: "deque[FeedbackRecord]" = field(default_factory=deque)
+    sources_used: List[str] = field(default_factory=list)
     confidence_score: float = 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "section_id": self.section_id,
+            "title": self.title,
+            "content": self.content,
+            "word_count": self.word_count,
+            "status": self.status,
+            "feedback_history": [entry.to_dict() for entry in self.feedback_history],
+            "sources_used": list(self.sources_used),
+            "confidence_score": self.confidence_score
+        }
 
 
-class ArticleOutline(BaseModel):
+@dataclass(slots=True)
+class ArticleOutline:
     """Enhanced article outline with feedback tracking"""
     title: str
     introduction: str
@@ -70,8 +122,11 @@ class ArticleOutline(BaseModel):
     estimated_total_words: int
     writing_style: str = "professional"
     target_audience: str = "general"
-    feedback_history: List[Dict[str, Any]] = []
+    feedback_history: List[Dict[str, Any]] = field(default_factory=list)
     approval_status: Literal["draft", "approved", "needs_revision"] = "draft"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
 
 
 class SectionFeedback(BaseModel):
@@ -81,7 +136,27 @@ class SectionFeedback(BaseModel):
     feedback_text: str
     specific_changes: Optional[str] = None
     priority: Literal["low", "medium", "high"] = "medium"
-    timestamp: datetime = Field(default_factory=datetime.now)
+    timestamp_ns: int = Field(default_factory=time.monotonic_ns)
+    
+    @computed_field
+    @property
+    def timestamp(self) -> str:
+        return monotonic_ns_to_datetime(self.timestamp_ns).isoformat()
+    
+    _history_entry: Optional[FeedbackRecord] = PrivateAttr(default=None)
+    
+    def history_entry(self) -> FeedbackRecord:
+        """Build the history record once and reuse it for every history append"""
+        if self._history_entry is None:
+            self._history_entry = FeedbackRecord(
+                self.section_id,
+                self.feedback_type,
+                self.feedback_text,
+                self.specific_changes,
+                self.priority,
+                self.timestamp_ns
+            )
+        return self._history_entry
 
 
 class ArticleFeedback(BaseModel):
@@ -93,18 +168,58 @@ class ArticleFeedback(BaseModel):
     priority: Literal["low", "medium", "high"] = "medium"
 
 
-class GenerationState(BaseModel):
+# Older history entries are superseded, so long refinement sessions keep only the most recent ones
+GENERATION_HISTORY_LIMIT = 100
+
+
+@dataclass(slots=True)
+class GenerationState:
     """Current state of article generation process"""
-    article_id: Optional[int] = None
     collection_id: int
     topic: str
     current_phase: GenerationPhase
+    article_id: Optional[int] = None
     outline: Optional[ArticleOutline] = None
-    sections: Dict[str, SectionContent] = {}
+    sections: Dict[str, SectionContent] = field(default_factory=dict)
+    # Outline sections as parallel arrays, in outline order
+    section_order: List[str] = field(default_factory=list)
+    section_titles: List[str] = field(default_factory=list)
+    section_id_index: Dict[str, int] = field(default_factory=dict)
     current_section_id: Optional[str] = None
-    feedback_queue: List[Union[SectionFeedback, ArticleFeedback]] = []
-    generation_history: List[Dict[str, Any]] = []
-    user_preferences: Dict[str, Any] = {}
+    feedback_queue: List[Union[SectionFeedback, ArticleFeedback]] = field(default_factory=list)
+    generation_history: "deque[Dict[str, Any]]" = field(default_factory=lambda: deque(maxlen=GENERATION_HISTORY_LIMIT))
+    latest_by_phase: Dict[GenerationPhase, Any] = field(default_factory=dict)  # Most recent result per phase
+    user_preferences: Dict[str, Any] = field(default_factory=dict)
+    approved_count: int = 0  # Sections currently approved, kept in step with sections
+    total_word_count: int = 0  # Sum of section word counts, kept in step with sections
+    
+    def set_outline_sections(self, sections: List[Dict[str, Any]]) -> None:
+        """Index outline sections by id so lookups do not scan the outline"""
+        self.section_order = [section.get("id") for section in sections]
+        self.section_titles = [section.get("title", "Untitled Section") for section in sections]
+        self.section_id_index = {section_id: index for index, section_id in enumerate(self.section_order)}
+    
+    def record(self, phase: GenerationPhase, result: Any, **extra: Any) -> None:
+        """Append a history entry and index it as the latest result for its phase"""
+        self.generation_history.append({
+            "phase": phase,
+            "result": result,
+            "timestamp_ns": time.monotonic_ns(),
+            **extra
+        })
+        self.latest_by_phase[phase] = result
+    
+    def store_section(self, section_id: str, section: SectionContent) -> None:
+        """Store or replace a section and update the running counters"""
+        previous = self.sections.get(section_id)
+        if previous is not None:
+            self.total_word_count -= previous.word_count
+            if previous.status == "approved":
+                self.approved_count -= 1
+        self.sections[section_id] = section
+        self.total_word_count += section.word_count
+        if section.status == "approved":
+            self.approved_count += 1
 
 
 @dataclass
@@ -118,10 +233,123 @@ class AgentDependencies:
     user_preferences: Dict[str, Any] = None
 
 
-def create_research_agent(model_name: str = 'llama3.2:3b'):
+class SessionStore(MutableMapping):
+    """
+    LRU mapping of session id to GenerationState with an idle TTL
+    
+    Every access refreshes a session's expiry, so LRU order is also expiry order and
+    stale sessions are swept from the front on each write.
+    """
+    
+    def __init__(self, maxsize: int = 256, ttl: float = 3600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, GenerationState]]" = OrderedDict()
+    
+    def __getitem__(self, session_id: str) -> GenerationState:
+        expires_at, state = self._data[session_id]
+        now = time.monotonic()
+        if expires_at < now:
+            del self._data[session_id]
+            raise KeyError(session_id)
+        self._data[session_id] = (now + self.ttl, state)
+        self._data.move_to_end(session_id)
+        return state
+    
+    def __setitem__(self, session_id: str, state: GenerationState):
+        now = time.monotonic()
+        self._data[session_id] = (now + self.ttl, state)
+        self._data.move_to_end(session_id)
+        while self._data:
+            oldest_id, (expires_at, _) = next(iter(self._data.items()))
+            if expires_at >= now and len(self._data) <= self.maxsize:
+                break
+            del self._data[oldest_id]
+            logger.info(f"🧹 Evicted inactive session: {oldest_id}")
+    
+    def __delitem__(self, session_id: str):
+        del self._data[session_id]
+    
+    def __iter__(self):
+        return iter(list(self._data))
+    
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+@lru_cache(maxsize=1)
+def get_shared_http_client() -> httpx.AsyncClient:
+    """
+    Pooled HTTP/2 client shared by every agent in the process
+    
+    Server-side throughput is governed by OLLAMA_NUM_PARALLEL and OLLAMA_MAX_LOADED_MODELS;
+    set OLLAMA_KEEP_ALIVE (e.g. "30m") on the server so models and their prompt KV cache
+    stay resident between calls.
+    """
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(300.0, connect=10.0),
+        limits=httpx.Limits(max_keepalive_connections=40, max_connections=100, keepalive_expiry=30.0)
+    )
+
+
+async def close_shared_http_client():
+    """Close the shared agent HTTP client on application shutdown"""
+    if get_shared_http_client.cache_info().currsize:
+        await get_shared_http_client().aclose()
+        get_shared_http_client.cache_clear()
+
+
+@lru_cache(maxsize=1)
+def _load_pydantic_ai() -> None:
+    """
+    Import pydantic-ai on first agent construction instead of at module import
+    
+    The names are bound as module globals because pydantic-ai resolves the
+    RunContext annotation of each tool function against this module's namespace.
+    """
+    global Agent, RunContext, OllamaModel
+    from pydantic_ai import Agent, RunContext
+    from pydantic_ai.models.ollama import OllamaModel
+
+
+def _ollama_model(model_name: str, http_client: Optional[httpx.AsyncClient] = None):
+    """Build the pydantic-ai Ollama model, reusing a shared HTTP client when one is given"""
+    _load_pydantic_ai()
+    if http_client is None:
+        return f'ollama:{model_name}'
+    return OllamaModel(model_name, base_url=f"{get_settings().ollama_url}/v1/", http_client=http_client)
+
+
+class GenerateSectionResponse(msgspec.Struct):
+    """Result of generate_section; encode with msgspec.json.encode"""
+    session_id: str
+    phase: GenerationPhase
+    section_id: str
+    status: str
+    section_content: Dict[str, Any]
+    requires_feedback: bool = True
+    next_action: str = "provide_section_feedback_or_continue"
+
+
+@lru_cache(maxsize=1)
+def get_agent_run_semaphore() -> asyncio.Semaphore:
+    """
+    Process-wide limit on concurrent agent runs (AGENT_MAX_CONCURRENCY)
+    
+    It is separate from get_llm_semaphore() because agent tools call the LLM while
+    their run holds a slot; sharing one semaphore could deadlock. The LLM calls made
+    inside agent runs are therefore capped by LLM_MAX_CONCURRENCY as well.
+    """
+    return asyncio.Semaphore(get_settings().AGENT_MAX_CONCURRENCY)
+
+
+@lru_cache(maxsize=16)
+def create_research_agent(model_name: str = 'llama3.2:3b', http_client: Optional[httpx.AsyncClient] = None):
     """Enhanced research agent with web search fallback"""
-    return Agent(
-        f'ollama:{model_name}',
+    _load_pydantic_ai()
+    agent = Agent(
+        _ollama_model(model_name, http_client),
         deps_type=AgentDependencies,
         result_type=AgentResponse,
         system_prompt="""
@@ -138,12 +366,17 @@ def create_research_agent(model_name: str = 'llama3.2:3b'):
         When using web search, focus on recent and authoritative sources.
         """
     )
+    # Registered here so the tool schema is built once per cached agent
+    agent.tool(search_knowledge_base)
+    return agent
 
 
-def create_outline_agent(model_name: str = 'llama3.2:3b'):
+@lru_cache(maxsize=16)
+def create_outline_agent(model_name: str = 'llama3.2:3b', http_client: Optional[httpx.AsyncClient] = None):
     """Agent for creating and refining article outlines"""
+    _load_pydantic_ai()
     return Agent(
-        f'ollama:{model_name}',
+        _ollama_model(model_name, http_client),
         deps_type=AgentDependencies,
         result_type=AgentResponse,
         system_prompt="""
@@ -162,10 +395,12 @@ def create_outline_agent(model_name: str = 'llama3.2:3b'):
     )
 
 
-def create_section_writer_agent(model_name: str = 'llama3.2:3b'):
+@lru_cache(maxsize=16)
+def create_section_writer_agent(model_name: str = 'llama3.2:3b', http_client: Optional[httpx.AsyncClient] = None):
     """Agent for generating individual article sections"""
-    return Agent(
-        f'ollama:{model_name}',
+    _load_pydantic_ai()
+    agent = Agent(
+        _ollama_model(model_name, http_client),
         deps_type=AgentDependencies,
         result_type=AgentResponse,
         system_prompt="""
@@ -182,12 +417,16 @@ def create_section_writer_agent(model_name: str = 'llama3.2:3b'):
         Always cite sources appropriately and maintain factual accuracy.
         """
     )
+    agent.tool(generate_section_content)
+    return agent
 
 
-def create_refinement_agent(model_name: str = 'llama3.2:3b'):
+@lru_cache(maxsize=16)
+def create_refinement_agent(model_name: str = 'llama3.2:3b', http_client: Optional[httpx.AsyncClient] = None):
     """Agent for processing feedback and refining content"""
-    return Agent(
-        f'ollama:{model_name}',
+    _load_pydantic_ai()
+    agent = Agent(
+        _ollama_model(model_name, http_client),
         deps_type=AgentDependencies,
         result_type=AgentResponse,
         system_prompt="""
@@ -204,12 +443,16 @@ def create_refinement_agent(model_name: str = 'llama3.2:3b'):
         Be responsive to user preferences and maintain high content quality.
         """
     )
+    agent.tool(refine_content_with_feedback)
+    return agent
 
 
-def create_review_agent(model_name: str = 'llama3.2:3b'):
+@lru_cache(maxsize=16)
+def create_review_agent(model_name: str = 'llama3.2:3b', http_client: Optional[httpx.AsyncClient] = None):
     """Agent for final review and quality assurance"""
+    _load_pydantic_ai()
     return Agent(
-        f'ollama:{model_name}',
+        _ollama_model(model_name, http_client),
         deps_type=AgentDependencies,
         result_type=AgentResponse,
         system_prompt="""
@@ -229,6 +472,104 @@ def create_review_agent(model_name: str = 'llama3.2:3b'):
 
 
 # Agent tool functions
+_WORD_RE = re.compile(r"\S+")
+
+
+def _count_words(text: str) -> int:
+    """Count whitespace-separated words without materializing a list"""
+    return sum(1 for _ in _WORD_RE.finditer(text))
+
+
+def _research_for_prompt(research_data: Any, max_results: int = 10, snippet_chars: int = 400) -> str:
+    """Compact, unindented JSON of only the research fields the model needs"""
+    if not research_data:
+        return "No research data available"
+    if not isinstance(research_data, dict) or "results" not in research_data:
+        return orjson.dumps(research_data, default=str).decode()
+    
+    compact = []
+    for item in research_data["results"][:max_results]:
+        if not isinstance(item, dict):
+            compact.append(str(item)[:snippet_chars])
+            continue
+        snippet = item.get("snippet") or item.get("text") or item.get("content") or ""
+        compact.append({
+            "title": item.get("title") or item.get("source", ""),
+            "snippet": snippet[:snippet_chars]
+        })
+    return orjson.dumps(compact).decode()
+
+
+# Section headings: "## Title", "## 1. Title", "1. Title" or "I. Title"; a single "# " line is the article title
+_OUTLINE_HEADING_RE = re.compile(r"^(?:#{2,6}\s*(?:\d+[.)]\s*)?|\d+[.)]\s+|[IVX]+\.\s+)(.+)$")
+_OUTLINE_POINT_RE = re.compile(r"^(?:[-*•+]|[a-z][.)])\s+(.+)$")
+_WORD_ESTIMATE_RE = re.compile(r"\(?~?\s*(\d{2,4})\s*words?\)?", re.IGNORECASE)
+DEFAULT_SECTION_WORDS = 400
+
+
+def _agent_payload(result_data: Any) -> Any:
+    """The data payload of an agent result, unwrapping the AgentResponse result_type"""
+    return result_data.data if isinstance(result_data, AgentResponse) else result_data
+
+
+def _outline_section(index: int, title: str, description: str = "", key_points: Any = (), estimated_words: Any = None) -> Dict[str, Any]:
+    match = _WORD_ESTIMATE_RE.search(title)
+    if match:
+        title = (title[:match.start()] + title[match.end():]).strip(" -:*")
+        estimated_words = estimated_words or int(match.group(1))
+    return {
+        "id": f"section_{index}",
+        "title": title.strip(" *:") or f"Section {index}",
+        "description": description,
+        "key_points": [str(point) for point in key_points],
+        "estimated_words": int(estimated_words or DEFAULT_SECTION_WORDS)
+    }
+
+
+def _outline_sections(outline_data: Any) -> List[Dict[str, Any]]:
+    """
+    Outline sections (id, title, description, key_points, estimated_words) from the outline agent
+    
+    Accepts structured data ({"sections": [...]} or a list) or a markdown/numbered text outline.
+    """
+    payload = _agent_payload(outline_data)
+    if isinstance(payload, dict):
+        payload = payload.get("sections", payload.get("outline", ""))
+    
+    if isinstance(payload, (list, tuple)):
+        sections = []
+        for item in payload:
+            if isinstance(item, dict):
+                sections.append(_outline_section(
+                    len(sections) + 1,
+                    str(item.get("title", "")),
+                    str(item.get("description", "")),
+                    item.get("key_points") or (),
+                    item.get("estimated_words")
+                ))
+            elif str(item).strip():
+                sections.append(_outline_section(len(sections) + 1, str(item).strip()))
+        return sections
+    
+    sections = []
+    for line in str(payload or "").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        heading = _OUTLINE_HEADING_RE.match(line)
+        if heading:
+            sections.append(_outline_section(len(sections) + 1, heading.group(1)))
+            continue
+        if not sections:
+            continue
+        point = _OUTLINE_POINT_RE.match(line)
+        if point:
+            sections[-1]["key_points"].append(point.group(1))
+        elif not sections[-1]["description"]:
+            sections[-1]["description"] = line
+    return sections
+
+
 async def search_knowledge_base(
     ctx: RunContext[AgentDependencies], 
     query: str, 
@@ -283,7 +624,7 @@ async def generate_section_content(
         Writing Style: {writing_style}
         
         Research Data Available:
-        {json.dumps(research_data, indent=2)}
+        {_research_for_prompt(research_data)}
         
         Requirements:
         1. Create engaging, well-structured content
@@ -301,8 +642,8 @@ async def generate_section_content(
         return {
             "title": section_title,
             "content": content.strip(),
-            "word_count": len(content.split()),
-            "sources_used": [item.get("source", "") for item in research_data.get("results", [])[:3]],
+            "word_count": _count_words(content),
+            "sources_used": tuple(item.get("source", "") for item in islice(research_data.get("results", ()), 3)),
             "confidence_score": 0.8  # Could be calculated based on research quality
         }
         
@@ -348,7 +689,7 @@ async def refine_content_with_feedback(
         return {
             "refined_content": refined_content.strip(),
             "changes_made": "Content refined based on user feedback",
-            "word_count": len(refined_content.split())
+            "word_count": _count_words(refined_content)
         }
         
     except Exception as e:
@@ -366,36 +707,37 @@ class EnhancedAgentOrchestrator:
         self.web_search_function = web_search_function
         self.model_name = model_name
         
-        # Initialize agents
-        self.research_agent = create_research_agent(model_name)
-        self.outline_agent = create_outline_agent(model_name)
-        self.section_writer_agent = create_section_writer_agent(model_name)
-        self.refinement_agent = create_refinement_agent(model_name)
-        self.review_agent = create_review_agent(model_name)
+        # Agents are cached per model and share one pooled HTTP client across orchestrators
+        self._http = get_shared_http_client()
         
-        # Register tools with agents
-        self._register_agent_tools()
+        # Initialize agents
+        self.research_agent = create_research_agent(model_name, self._http)
+        self.outline_agent = create_outline_agent(model_name, self._http)
+        self.section_writer_agent = create_section_writer_agent(model_name, self._http)
+        self.refinement_agent = create_refinement_agent(model_name, self._http)
+        self.review_agent = create_review_agent(model_name, self._http)
         
-        # Active generation states (session management)
-        self.active_generations: Dict[str, GenerationState] = {}
-    
-    def _register_agent_tools(self):
-        """Register tools with all agents"""
-        # Research agent tools
-        self.research_agent.tool(search_knowledge_base)
+        # Active generation states (session management), bounded and expired when idle
+        self.active_generations: SessionStore = SessionStore(maxsize=256, ttl=3600.0)
         
-        # Section writer agent tools  
-        self.section_writer_agent.tool(generate_section_content)
+        # Exact reuse of section drafts for the same title, style, and research
+        self._section_cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._section_cache_maxsize = 1024
         
-        # Refinement agent tools
-        self.refinement_agent.tool(refine_content_with_feedback)
+        # Bounds concurrent agent runs across every orchestrator and session
+        self._semaphore = get_agent_run_semaphore()
+    
+    async def _llm(self, prompt: str, **kwargs) -> str:
+        """Call llm_function within the process-wide concurrency limit"""
+        async with get_llm_semaphore():
+            return await self.llm_function(prompt, **kwargs)
     
     def _create_dependencies(self, generation_state: GenerationState) -> AgentDependencies:
         """Create agent dependencies for the current generation state"""
         return AgentDependencies(
             collection_id=self.collection_id,
             search_function=self.search_function,
-            llm_function=self.llm_function,
+            llm_function=self._llm,
             web_search_function=self.web_search_function,
             generation_state=generation_state,
             user_preferences=generation_state.user_preferences
@@ -437,27 +779,24 @@ class EnhancedAgentOrchestrator:
             raise ValueError(f"Session {session_id} not found")
         
         state = self.active_generations[session_id]
-        deps = self._create_dependencies(state)
         
         # Run research agent
-        research_result = await self.research_agent.run(
-            f"Research comprehensive information about: {state.topic}",
-            deps=deps
-        )
+        async with self._semaphore:
+            research_result = await self.research_agent.run(
+                f"Research comprehensive information about: {state.topic}",
+                deps=self._create_dependencies(state)
+            )
+        research_data = research_result.data
         
         # Update state
         state.current_phase = GenerationPhase.OUTLINE
-        state.generation_history.append({
-            "phase": GenerationPhase.RESEARCH,
-            "result": research_result.data,
-            "timestamp": datetime.now()
-        })
+        state.record(GenerationPhase.RESEARCH, research_data)
         
         return {
             "session_id": session_id,
             "phase": GenerationPhase.RESEARCH,
             "status": "completed",
-            "data": research_result.data,
+            "data": research_data,
             "next_phase": GenerationPhase.OUTLINE
         }
     
@@ -469,18 +808,14 @@ class EnhancedAgentOrchestrator:
         state = self.active_generations[session_id]
         deps = self._create_dependencies(state)
         
-        # Get research data from history
-        research_data = None
-        for entry in state.generation_history:
-            if entry["phase"] == GenerationPhase.RESEARCH:
-                research_data = entry["result"]
-                break
+        # Get the latest research data
+        research_data = state.latest_by_phase.get(GenerationPhase.RESEARCH)
         
         outline_prompt = f"""
         Create a comprehensive outline for an article about: {state.topic}
         
         Research Data:
-        {json.dumps(research_data, indent=2) if research_data else "No research data available"}
+        {_research_for_prompt(research_data)}
         
         {f"User Research Feedback: {research_feedback}" if research_feedback else ""}
         
@@ -491,17 +826,24 @@ class EnhancedAgentOrchestrator:
         - Provide estimated word counts for each section
         """
         
-        outline_result = await self.outline_agent.run(outline_prompt, deps=deps)
+        async with self._semaphore:
+            outline_result = await self.outline_agent.run(outline_prompt, deps=deps)
+        
+        sections = _outline_sections(outline_result.data)
+        if not sections:
+            raise ValueError("Outline agent returned no sections")
         
         # Update state
         state.current_phase = GenerationPhase.SECTION_GENERATION
         state.outline = ArticleOutline(
             title=f"Article: {state.topic}",
             introduction="Introduction section",
-            sections=[],  # Will be populated from outline_result
+            sections=sections,
             conclusion="Conclusion section",
-            estimated_total_words=1000  # Will be calculated
+            estimated_total_words=sum(section["estimated_words"] for section in sections)
         )
+        state.set_outline_sections(state.outline.sections)
+        state.record(GenerationPhase.OUTLINE, outline_result.data)
         
         return {
             "session_id": session_id,
@@ -517,58 +859,197 @@ class EnhancedAgentOrchestrator:
         session_id: str, 
         section_id: str,
         section_feedback: str = ""
-    ) -> Dict[str, Any]:
+    ) -> GenerateSectionResponse:
         """Generate content for a specific section"""
         if session_id not in self.active_generations:
             raise ValueError(f"Session {session_id} not found")
         
         state = self.active_generations[session_id]
-        deps = self._create_dependencies(state)
         
         # Get section details from outline
         if not state.outline or not state.outline.sections:
             raise ValueError("No outline available for section generation")
         
         # Find the specific section
-        section_data = None
-        for section in state.outline.sections:
-            if section.get("id") == section_id:
-                section_data = section
-                break
-        
-        if not section_data:
+        index = state.section_id_index.get(section_id)
+        if index is None:
             raise ValueError(f"Section {section_id} not found in outline")
+        section_data = state.outline.sections[index]
+        
+        _, section_content = await self._generate_one(state, section_data)
+        
+        # Store section
+        state.store_section(section_id, section_content)
+        state.current_section_id = section_id
         
-        # Generate section content
-        section_result = await self.section_writer_agent.run(
-            f"Generate content for section: {section_data.get('title', 'Untitled Section')}",
-            deps=deps
+        return GenerateSectionResponse(
+            session_id=session_id,
+            phase=GenerationPhase.SECTION_GENERATION,
+            section_id=section_id,
+            status="completed",
+            section_content=section_content.to_dict()
         )
+    
+    @staticmethod
+    def _section_cache_key(state: GenerationState, title: str) -> str:
+        """Hash of the section title, writing style, and latest research data"""
+        style = state.user_preferences.get("writing_style", "professional")
+        research_data = state.latest_by_phase.get(GenerationPhase.RESEARCH)
+        payload = f"{title}|{style}|".encode() + orjson.dumps(
+            research_data, option=orjson.OPT_SORT_KEYS, default=str
+        )
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+    
+    async def _generate_one(
+        self,
+        state: GenerationState,
+        section_data: Dict[str, Any]
+    ) -> Tuple[str, SectionContent]:
+        """Run the section writer agent for one outline section"""
+        section_id = section_data.get("id")
+        title = section_data.get('title', 'Untitled Section')
+        
+        # Reuse a draft generated from exactly the same inputs
+        cache_key = self._section_cache_key(state, title)
+        result_data = self._section_cache.get(cache_key)
+        if result_data is not None:
+            self._section_cache.move_to_end(cache_key)
+        else:
+            async with self._semaphore:
+                section_result = await self.section_writer_agent.run(
+                    f"Generate content for section: {title}",
+                    deps=self._create_dependencies(state)
+                )
+            result_data = _agent_payload(section_result.data)
+            if not isinstance(result_data, dict):
+                result_data = {"content": str(result_data or ""), "word_count": _count_words(str(result_data or ""))}
+            self._section_cache[cache_key] = result_data
+            if len(self._section_cache) > self._section_cache_maxsize:
+                self._section_cache.popitem(last=False)
         
-        # Create section content object
         section_content = SectionContent(
             section_id=section_id,
-            title=section_data.get('title', 'Untitled Section'),
-            content=section_result.data.get('content', ''),
-            word_count=section_result.data.get('word_count', 0),
-            sources_used=section_result.data.get('sources_used', []),
-            confidence_score=section_result.data.get('confidence_score', 0.0)
+            title=title,
+            content=result_data.get('content', ''),
+            word_count=result_data.get('word_count', 0),
+            sources_used=result_data.get('sources_used', []),
+            confidence_score=result_data.get('confidence_score', 0.0)
         )
+        return section_id, section_content
+    
+    async def generate_all_sections(self, session_id: str) -> Dict[str, Any]:
+        """
+        Generate every outline section concurrently
         
-        # Store section
-        state.sections[section_id] = section_content
-        state.current_section_id = section_id
+        Concurrency is capped by AGENT_MAX_CONCURRENCY, and LLM calls made by the
+        agents by LLM_MAX_CONCURRENCY. Ollama only serves requests in parallel up to
+        its OLLAMA_NUM_PARALLEL setting, so raising these without it just queues
+        requests on the server.
+        """
+        if session_id not in self.active_generations:
+            raise ValueError(f"Session {session_id} not found")
+        
+        state = self.active_generations[session_id]
+        
+        if not state.outline or not state.outline.sections:
+            raise ValueError("No outline available for section generation")
+        
+        results = await asyncio.gather(
+            *(self._generate_one(state, section_data) for section_data in state.outline.sections),
+            return_exceptions=True
+        )
+        
+        failed_sections = []
+        for section_data, result in zip(state.outline.sections, results):
+            if isinstance(result, Exception):
+                logger.error(f"Section generation failed for {section_data.get('id')}: {result}")
+                failed_sections.append(section_data.get("id"))
+                continue
+            section_id, section_content = result
+            state.store_section(section_id, section_content)
         
         return {
             "session_id": session_id,
             "phase": GenerationPhase.SECTION_GENERATION,
-            "section_id": section_id,
-            "status": "completed",
-            "section_content": section_content.dict(),
+            "status": "completed" if not failed_sections else "partial",
+            "sections": {section_id: section.to_dict() for section_id, section in state.sections.items()},
+            "failed_sections": failed_sections,
             "requires_feedback": True,
             "next_action": "provide_section_feedback_or_continue"
         }
     
+    async def generate_article_pipelined(
+        self,
+        topic: str,
+        article_type: str = "comprehensive",
+        target_length: str = "medium",
+        writing_style: str = "professional",
+        user_preferences: Dict[str, Any] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run research, outline, and all sections without client round-trips between phases
+        
+        Sections are scheduled as soon as the outline exists and reported as each one
+        finishes, so an SSE or WebSocket route can forward the yielded progress events.
+        """
+        events: asyncio.Queue = asyncio.Queue()
+        
+        async def _run():
+            tasks: Dict[asyncio.Task, str] = {}
+            try:
+                started = await self.start_article_generation(
+                    topic, article_type, target_length, writing_style, user_preferences
+                )
+                session_id = started["session_id"]
+                await events.put({"event": "started", **started})
+                
+                research = await self.process_research_phase(session_id)
+                await events.put({"event": "research", "session_id": session_id, "data": research["data"]})
+                
+                outline = await self.generate_outline(session_id)
+                await events.put({"event": "outline", "session_id": session_id, "outline": outline["outline"]})
+                
+                state = self.active_generations[session_id]
+                tasks = {
+                    asyncio.create_task(self._generate_one(state, section_data)): section_data.get("id")
+                    for section_data in (state.outline.sections if state.outline else [])
+                }
+                for task in asyncio.as_completed(tasks):
+                    try:
+                        section_id, section_content = await task
+                    except Exception as e:
+                        logger.error(f"Pipelined section generation failed: {e}")
+                        await events.put({"event": "section_failed", "session_id": session_id, "error": str(e)})
+                        continue
+                    state.store_section(section_id, section_content)
+                    await events.put({
+                        "event": "section",
+                        "session_id": session_id,
+                        "section_id": section_id,
+                        "section_content": section_content.to_dict()
+                    })
+                
+                await events.put({
+                    "event": "completed",
+                    "session_id": session_id,
+                    "sections_count": len(state.sections),
+                    "total_words": state.total_word_count
+                })
+            except Exception as e:
+                logger.error(f"Pipelined article generation failed: {e}")
+                await events.put({"event": "error", "error": str(e)})
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await events.put(None)
+        
+        runner = asyncio.create_task(_run())
+        try:
+            while (event := await events.get()) is not None:
+                yield event
+        finally:
+            runner.cancel()
+    
     async def process_section_feedback(
         self,
         session_id: str,
@@ -587,8 +1068,10 @@ class EnhancedAgentOrchestrator:
         section = state.sections[section_id]
         
         if feedback.feedback_type == FeedbackType.APPROVE:
+            if section.status != "approved":
+                state.approved_count += 1
             section.status = "approved"
-            section.feedback_history.append(feedback.dict())
+            section.feedback_history.append(feedback.history_entry())
             
             return {
                 "session_id": session_id,
@@ -601,16 +1084,22 @@ class EnhancedAgentOrchestrator:
             # Process refinement feedback
             deps = self._create_dependencies(state)
             
-            refinement_result = await self.refinement_agent.run(
-                f"Refine section based on feedback: {feedback.feedback_text}",
-                deps=deps
-            )
+            async with self._semaphore:
+                refinement_result = await self.refinement_agent.run(
+                    f"Refine section based on feedback: {feedback.feedback_text}",
+                    deps=deps
+                )
             
             # Update section with refined content
+            word_count = refinement_result.data.get('word_count', section.word_count)
+            state.total_word_count += word_count - section.word_count
+            if section.status == "approved":
+                state.approved_count -= 1
             section.content = refinement_result.data.get('refined_content', section.content)
-            section.word_count = refinement_result.data.get('word_count', section.word_count)
+            section.word_count = word_count
             section.status = "needs_revision"
-            section.feedback_history.append(feedback.dict())
+            section.feedback_history.append(feedback.history_entry())
+            state.record(GenerationPhase.SECTION_REFINEMENT, refinement_result.data, section_id=section_id)
             
             return {
                 "session_id": session_id,
@@ -643,23 +1132,10 @@ class EnhancedAgentOrchestrator:
             }
         
         # Compile final article
-        final_content = []
-        
-        # Add introduction
-        if state.outline and state.outline.introduction:
-            final_content.append(f"# {state.outline.title}\n\n{state.outline.introduction}\n\n")
-        
-        # Add all approved sections
-        for section_id in sorted(state.sections.keys()):
-            section = state.sections[section_id]
-            final_content.append(f"## {section.title}\n\n{section.content}\n\n")
-        
-        # Add conclusion
-        if state.outline and state.outline.conclusion:
-            final_content.append(f"## Conclusion\n\n{state.outline.conclusion}\n\n")
-        
-        final_article = "".join(final_content)
-        total_words = sum(section.word_count for section in state.sections.values())
+        buf = io.StringIO()
+        for part in self._iter_article_parts(state):
+            buf.write(part)
+        final_article = buf.getvalue()
         
         # Update state
         state.current_phase = GenerationPhase.FINAL_REVIEW
@@ -669,11 +1145,39 @@ class EnhancedAgentOrchestrator:
             "phase": GenerationPhase.FINAL_REVIEW,
             "status": "completed",
             "final_article": final_article,
-            "total_words": total_words,
+            "total_words": state.total_word_count,
             "sections_count": len(state.sections),
             "requires_final_feedback": True
         }
     
+    def _iter_article_parts(self, state: GenerationState) -> Iterator[str]:
+        """Yield markdown for the introduction, each section in outline order, and the conclusion"""
+        # Add introduction
+        if state.outline and state.outline.introduction:
+            yield f"# {state.outline.title}\n\n{state.outline.introduction}\n\n"
+        
+        # Sections follow the outline; any section not in the outline keeps its insertion order
+        ordered_ids = [section_id for section_id in state.section_order if section_id in state.sections]
+        if len(ordered_ids) != len(state.sections):
+            listed = set(ordered_ids)
+            ordered_ids.extend(section_id for section_id in state.sections if section_id not in listed)
+        
+        for section_id in ordered_ids:
+            section = state.sections[section_id]
+            yield f"## {section.title}\n\n{section.content}\n\n"
+        
+        # Add conclusion
+        if state.outline and state.outline.conclusion:
+            yield f"## Conclusion\n\n{state.outline.conclusion}\n\n"
+    
+    async def stream_final_article(self, session_id: str) -> AsyncIterator[str]:
+        """Yield the assembled article one part at a time, for use with a StreamingResponse"""
+        if session_id not in self.active_generations:
+            raise ValueError(f"Session {session_id} not found")
+        
+        for part in self._iter_article_parts(self.active_generations[session_id]):
+            yield part
+    
     async def process_final_feedback(
         self,
         session_id: str,
@@ -696,16 +1200,12 @@ class EnhancedAgentOrchestrator:
             }
         
         else:
-            # Process section-specific feedback
-            refinement_results = []
-            
-            for section_feedback in feedback.section_feedback:
-                section_result = await self.process_section_feedback(
-                    session_id, 
-                    section_feedback.section_id, 
-                    section_feedback
-                )
-                refinement_results.append(section_result)
+            # Process section-specific feedback concurrently
+            # Each refinement takes an agent-run slot inside process_section_feedback
+            refinement_results = list(await asyncio.gather(*(
+                self.process_section_feedback(session_id, section_feedback.section_id, section_feedback)
+                for section_feedback in feedback.section_feedback
+            )))
             
             return {
                 "session_id": session_id,
@@ -726,14 +1226,19 @@ class EnhancedAgentOrchestrator:
             "session_id": session_id,
             "current_phase": state.current_phase,
             "topic": state.topic,
-            "sections_completed": len([s for s in state.sections.values() if s.status == "approved"]),
+            "sections_completed": state.approved_count,
             "total_sections": len(state.sections),
             "feedback_queue_length": len(state.feedback_queue),
-            "generation_history": state.generation_history
+            "generation_history": list(state.generation_history)
         }
     
     def cleanup_session(self, session_id: str):
         """Clean up completed session"""
         if session_id in self.active_generations:
             del self.active_generations[session_id]
-            logger.info(f"🧹 Cleaned up session: {session_id}")
\ No newline at end of file
+            logger.info(f"🧹 Cleaned up session: {session_id}")
+    
+    async def aclose(self):
+        """Clean up all sessions; the shared HTTP client is closed by close_shared_http_client"""
+        for session_id in list(self.active_generations):
+            self.cleanup_session(session_id)
\ No newline at end of file
@@ -3,11 +3,18 @@ Ollama client for embeddings and text generation
 """
 
 import asyncio
+import hashlib
 import json
 import logging
-from typing import List, Optional, Dict, Any
+import re
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 import httpx
+import numpy as np
+import orjson
 from app.core.config import get_settings
+from app.services.embedding_cache import EmbeddingDiskCache, pack_embedding, unpack_embedding
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
@@ -16,11 +23,37 @@ logger = logging.getLogger(__name__)
 
 class OllamaError(Exception):
     """Custom exception for Ollama-related errors"""
-    pass
+    
+    def __init__(self, message: str, status_code: Optional[int] = None, timed_out: bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.timed_out = timed_out
+
+
+# Matches a JSON object inside a ``` or ```json code fence
+_JSON_FENCE_RE = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+
+
+def _parse_json_object(response: str) -> Dict[str, Any]:
+    """Extract a JSON object from model output, tolerating code fences and surrounding prose"""
+    fenced = _JSON_FENCE_RE.search(response)
+    if fenced:
+        return json.loads(fenced.group(1))
+    return json.loads(response[response.find("{"):response.rfind("}") + 1])
+
+
+# Placeholder for texts whose embedding failed; shared because it is never mutated
+_EMPTY_EMBEDDING = np.empty(0, dtype=np.float32)
 
 
 class OllamaClient:
-    """Async client for Ollama API"""
+    """
+    Async client for Ollama API
+    
+    Import the module-level ollama_client rather than constructing another: each
+    instance owns an HTTP/2 pool, embedding caches, and SQLite connections, and
+    only the shared one is closed on shutdown and invalidated on settings changes.
+    """
     
     def __init__(self):
         settings = get_settings()
@@ -28,106 +61,202 @@ class OllamaClient:
         self.default_timeout = 300  # 5 minutes for embeddings
         self.generation_timeout = 600  # 10 minutes for large model text generation
         self.refinement_timeout = 180  # 3 minutes for refinement tasks (shorter for better UX)
+        self.embed_batch_size = settings.OLLAMA_EMBED_BATCH_SIZE  # Texts per api/embed request
+        self.embed_concurrency = settings.OLLAMA_EMBED_CONCURRENCY  # In-flight per-text embedding requests
+        self.keep_alive = settings.OLLAMA_KEEP_ALIVE  # Keeps models resident between requests instead of the 5 minute default
+        self.generation_options: Dict[str, Any] = {
+            "temperature": 0.7,
+            "top_p": 0.9,
+            "repeat_penalty": 1.1,
+            "top_k": 40,
+            "num_ctx": settings.OLLAMA_NUM_CTX,
+        }
+        if settings.OLLAMA_NUM_THREAD:
+            self.generation_options["num_thread"] = settings.OLLAMA_NUM_THREAD
+        self.model_options = settings.OLLAMA_MODEL_OPTIONS
+        self._client: Optional[httpx.AsyncClient] = None
+        # Cached vectors are packed (optionally fp16/int8 quantized) to stretch the same RAM and disk budget
+        self._embed_cache_quant = settings.OLLAMA_EMBED_CACHE_QUANT
+        self._embed_cache: "OrderedDict[bytes, bytes]" = OrderedDict()
+        self._embed_cache_cap = 10_000
+        self._inflight_embeddings: Dict[bytes, asyncio.Future] = {}
+        self._disk_cache = (
+            EmbeddingDiskCache(settings.EMBEDDING_CACHE_DIR, self._embed_cache_quant)
+            if settings.EMBEDDING_CACHE_DIR else None
+        )
+        self._tags_cache: set = set()
+        self._tags_expiry = 0.0
+        self._tags_ttl = 60.0  # Seconds before api/tags is fetched again
+        # Resolved user model selections, so chained LLM calls skip the settings SELECT
+        self._model_cache_ttl = 60.0
+        self._llm_model_cache: Dict[str, Any] = {"value": None, "expiry": 0.0}
+        self._embedding_model_cache: Dict[str, Any] = {"value": None, "expiry": 0.0}
+        self._model_cache_lock = asyncio.Lock()
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Pooled HTTP/2 client, created on first use and reused for every request
+        
+        httpx negotiates HTTP/2 via TLS ALPN only, so a plain http:// Ollama endpoint is
+        served over pooled HTTP/1.1 keep-alive; put Ollama behind a TLS proxy to multiplex.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.default_timeout,
+                limits=httpx.Limits(max_keepalive_connections=40, max_connections=100, keepalive_expiry=30),
+                http2=True
+            )
+        return self._client
+    
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._disk_cache is not None:
+            self._disk_cache.close()
+    
+    async def warmup(self, model: str, embedding: bool = False, keep_alive: Optional[str] = None) -> None:
+        """Load a model into memory ahead of the first real request and keep it resident"""
+        keep_alive = keep_alive or self.keep_alive
+        if embedding:
+            endpoint, data = "api/embed", {"model": model, "input": "ok", "keep_alive": keep_alive}
+        else:
+            # A generate request without a prompt only loads the model
+            endpoint, data = "api/generate", {"model": model, "stream": False, "keep_alive": keep_alive}
+        start = time.perf_counter()
+        await self._make_request(endpoint, data, timeout=self.generation_timeout)
+        logger.info(f"🔥 Warmed up model {model} in {time.perf_counter() - start:.1f}s")
+    
+    async def __aenter__(self) -> "OllamaClient":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
         
     async def _make_request(self, endpoint: str, data: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None, method: str = "POST") -> Dict[str, Any]:
         """Make an async request to Ollama"""
-        url = f"{self.base_url}/{endpoint}"
+        url = f"/{endpoint}"
         request_timeout = timeout or self.default_timeout
         
-        async with httpx.AsyncClient(timeout=request_timeout) as client:
-            try:
-                if method.upper() == "GET":
-                    response = await client.get(url)
-                else:
-                    response = await client.post(url, json=data or {})
-                response.raise_for_status()
-                return response.json()
-            except httpx.TimeoutException:
-                raise OllamaError(f"Ollama request timed out: {endpoint}")
-            except httpx.HTTPStatusError as e:
-                raise OllamaError(f"Ollama HTTP error {e.response.status_code}: {e.response.text}")
-            except Exception as e:
-                raise OllamaError(f"Ollama request failed: {str(e)}")
+        try:
+            if method.upper() == "GET":
+                response = await self.client.get(url, timeout=request_timeout)
+            else:
+                # orjson encodes/decodes the large float arrays of embedding payloads far faster than stdlib json
+                response = await self.client.post(
+                    url,
+                    content=orjson.dumps(data or {}),
+                    headers={"content-type": "application/json"},
+                    timeout=request_timeout
+                )
+            response.raise_for_status()
+            logger.debug("Ollama %s answered over %s", endpoint, response.http_version)
+            return orjson.loads(response.content)
+        except httpx.TimeoutException:
+            raise OllamaError(f"Ollama request timed out: {endpoint}", timed_out=True)
+        except httpx.HTTPStatusError as e:
+            raise OllamaError(f"Ollama HTTP error {e.response.status_code}: {e.response.text}", status_code=e.response.status_code)
+        except Exception as e:
+            raise OllamaError(f"Ollama request failed: {str(e)}")
+    
+    async def _get_available_models_cached(self) -> set:
+        """Names of installed models, fetched from api/tags at most once per TTL"""
+        if time.monotonic() < self._tags_expiry:
+            return self._tags_cache
+        
+        response = await self._make_request("api/tags", method="GET")
+        names = set()
+        for model in response.get("models", []):
+            name = model["name"]
+            names.add(name)
+            if name.endswith(":latest"):
+                names.add(name[:-len(":latest")])
+        
+        self._tags_cache = names
+        self._tags_expiry = time.monotonic() + self._tags_ttl
+        return names
     
     async def check_model_availability(self, model_name: str) -> bool:
         """Check if a model is available in Ollama"""
         try:
-            response = await self._make_request("api/tags", method="GET")
-            models = response.get("models", [])
-            available_models = [model["name"] for model in models]
+            available_models = await self._get_available_models_cached()
             return model_name in available_models or f"{model_name}:latest" in available_models
         except Exception as e:
             logger.warning(f"Could not check model availability: {e}")
             return False
     
+    def invalidate_model_cache(self) -> None:
+        """Forget cached model selections; call after the model settings change"""
+        self._llm_model_cache.update(value=None, expiry=0.0)
+        self._embedding_model_cache.update(value=None, expiry=0.0)
+    
+    async def _cached_model(self, cache: Dict[str, Any], db: Optional[AsyncSession], key_pattern: str, kind: str, default) -> str:
+        """
+        Return the user's model selection for a settings key, cached for a short TTL
+        
+        Only the outcome of a successful settings lookup is cached. Calls without a
+        db session and lookups that fail get default() without touching the cache,
+        so they never mask the saved selection for callers that do pass a db.
+        """
+        if not db:
+            return await default()
+        if cache["value"] is not None and time.monotonic() < cache["expiry"]:
+            return cache["value"]
+        # Concurrent misses share one lookup; they often share one database session too
+        async with self._model_cache_lock:
+            if cache["value"] is not None and time.monotonic() < cache["expiry"]:
+                return cache["value"]
+            try:
+                model = await self._lookup_user_model(db, key_pattern, kind)
+            except Exception as e:
+                logger.error(f"Failed to get user {kind} model: {e}")
+                return await default()
+            if model is None:
+                model = await default()
+            cache.update(value=model, expiry=time.monotonic() + self._model_cache_ttl)
+            return model
+    
+    @staticmethod
+    async def _lookup_user_model(db: AsyncSession, key_pattern: str, kind: str) -> Optional[str]:
+        """Look up a model selection in the settings table; None if none is saved"""
+        # Import here to avoid circular imports
+        from app.models.settings import Setting
+        
+        result = await db.execute(
+            select(Setting).where(Setting.key_alias.ilike(key_pattern))
+        )
+        setting = result.scalar_one_or_none()
+        if setting is None:
+            logger.info(f"No user {kind} setting found, using default")
+            return None
+        # Check model_name field first, then config_json's model field
+        if setting.model_name:
+            logger.info(f"Using user-selected {kind} model from model_name: {setting.model_name}")
+            return setting.model_name
+        if setting.config_json and setting.config_json.get('model'):
+            model = setting.config_json['model']
+            logger.info(f"Using user-selected {kind} model from config: {model}")
+            return model
+        return None
+    
     async def get_user_llm_model(self, db: Optional[AsyncSession] = None) -> str:
         """Get the user's selected LLM model from settings"""
-        if not db:
-            # If no DB session provided, return a good default
-            return await self._get_best_available_model()
-            
-        try:
-            # Import here to avoid circular imports
-            from app.models.settings import Setting
-            
-            # Get LLM settings from database
-            result = await db.execute(
-                select(Setting).where(Setting.key_alias.ilike('%llm%'))
-            )
-            llm_setting = result.scalar_one_or_none()
-            
-            if llm_setting:
-                # Check model_name field first
-                if llm_setting.model_name:
-                    logger.info(f"Using user-selected model from model_name: {llm_setting.model_name}")
-                    return llm_setting.model_name
-                # Check config_json for model field
-                elif llm_setting.config_json and llm_setting.config_json.get('model'):
-                    model = llm_setting.config_json['model']
-                    logger.info(f"Using user-selected model from config: {model}")
-                    return model
-            else:
-                # No user setting found, get best available model
-                return await self._get_best_available_model()
-                
-        except Exception as e:
-            logger.error(f"Failed to get user LLM model: {e}")
-            return await self._get_best_available_model()
+        return await self._cached_model(
+            self._llm_model_cache, db, '%llm%', "LLM", self._get_best_available_model
+        )
     
     async def get_user_embedding_model(self, db: Optional[AsyncSession] = None) -> str:
         """Get user's configured embedding model or default"""
-        if not db:
-            # If no DB session provided, return default
-            return "nomic-embed-text"
-            
-        try:
-            # Import here to avoid circular imports
-            from app.models.settings import Setting
-            
-            # Get embedding settings from database
-            result = await db.execute(
-                select(Setting).where(Setting.key_alias.ilike('%embed%'))
-            )
-            embedding_setting = result.scalar_one_or_none()
-            
-            if embedding_setting:
-                # Check model_name field first
-                if embedding_setting.model_name:
-                    logger.info(f"Using user-selected embedding model from model_name: {embedding_setting.model_name}")
-                    return embedding_setting.model_name
-                # Check config_json for model field
-                elif embedding_setting.config_json and embedding_setting.config_json.get('model'):
-                    model = embedding_setting.config_json['model']
-                    logger.info(f"Using user-selected embedding model from config: {model}")
-                    return model
-            
-            # No user setting found, return default
-            logger.info("No user embedding setting found, using default: nomic-embed-text")
-            return "nomic-embed-text"
-                
-        except Exception as e:
-            logger.error(f"Failed to get user embedding model: {e}")
-            return "nomic-embed-text"
+        return await self._cached_model(
+            self._embedding_model_cache, db, '%embed%', "embedding", self._default_embedding_model
+        )
+    
+    @staticmethod
+    async def _default_embedding_model() -> str:
+        return "nomic-embed-text"
     
     async def list_models(self) -> List[Dict[str, Any]]:
         """List all available Ollama models"""
@@ -173,8 +302,9 @@ class OllamaClient:
                 "mixtral:latest"    # Largest fallback (avoid if possible)
             ]
             
+            available_models = await self._get_available_models_cached()
             for model in preferred_models:
-                if await self.check_model_availability(model):
+                if model in available_models or f"{model}:latest" in available_models:
                     logger.info(f"Selected best available model: {model}")
                     return model
             
@@ -186,8 +316,8 @@ class OllamaClient:
             logger.error(f"Failed to get best available model: {e}")
             return "llama3.2:3b"
     
-    async def generate_embedding(self, text: str, model: str = "nomic-embed-text") -> List[float]:
-        """Generate embedding for text using Ollama"""
+    async def generate_embedding(self, text: str, model: str = "nomic-embed-text") -> np.ndarray:
+        """Generate a float32 embedding vector for text using Ollama"""
         if not text.strip():
             raise ValueError("Text cannot be empty")
         
@@ -195,57 +325,281 @@ class OllamaClient:
         if ":" not in model:
             model = f"{model}:latest"
         
-        # Check if model is available
-        if not await self.check_model_availability(model):
-            raise OllamaError(f"Embedding model '{model}' not available")
+        cache_key = self._embed_cache_key(text, model)
+        cached = self._get_cached_embedding(cache_key)
+        if cached is not None:
+            return cached
         
+        # Concurrent callers for the same text share one request instead of each calling Ollama
+        inflight = self._inflight_embeddings.get(cache_key)
+        if inflight is not None:
+            # Shielded so a cancelled waiter doesn't cancel the request for everyone else
+            return await asyncio.shield(inflight)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight_embeddings[cache_key] = future
         try:
-            logger.debug(f"Generating embedding for text of length {len(text)}")
-            
-            data = {
-                "model": model,
-                "prompt": text,
-            }
-            
-            response = await self._make_request("api/embeddings", data)
-            
-            embedding = response.get("embedding")
-            if not embedding:
-                raise OllamaError("No embedding returned from Ollama")
-            
-            logger.debug(f"Generated embedding of dimension {len(embedding)}")
+            embedding = await self._fetch_embedding(text, model, cache_key)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody else was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(embedding)
             return embedding
-            
+        finally:
+            del self._inflight_embeddings[cache_key]
+    
+    async def _fetch_embedding(self, text: str, model: str, cache_key: bytes) -> np.ndarray:
+        """Load an embedding from the disk cache or Ollama and cache it"""
+        if self._disk_cache is not None:
+            blob = await asyncio.to_thread(self._disk_cache.get, model, cache_key)
+            if blob is not None:
+                self._cache_packed(cache_key, blob)
+                return unpack_embedding(blob, self._embed_cache_quant)
+        
+        try:
+            embedding = await self._embed_one(text, model)
+        except OllamaError as e:
+            logger.error(f"Failed to generate embedding: {e}")
+            # Validate the model only after a failure instead of before every call
+            if (e.status_code == 404 or "not found" in str(e).lower()) and not await self.check_model_availability(model):
+                raise OllamaError(f"Embedding model '{model}' not available", status_code=e.status_code) from e
+            raise
         except Exception as e:
             logger.error(f"Failed to generate embedding: {e}")
             raise
+        blob = self._cache_embedding(cache_key, embedding)
+        if self._disk_cache is not None:
+            await asyncio.to_thread(self._disk_cache.put, model, cache_key, blob)
+        return embedding
+    
+    @staticmethod
+    def _embed_cache_key(text: str, model: str) -> bytes:
+        return hashlib.sha256(f"{model}\0{text}".encode()).digest()
+    
+    def _get_cached_embedding(self, key: bytes) -> Optional[np.ndarray]:
+        """Return a cached embedding and mark it as recently used"""
+        blob = self._embed_cache.get(key)
+        if blob is None:
+            return None
+        self._embed_cache.move_to_end(key)
+        return unpack_embedding(blob, self._embed_cache_quant)
+    
+    def _cache_embedding(self, key: bytes, embedding: np.ndarray) -> bytes:
+        """Pack and store an embedding; returns the packed bytes for the disk cache"""
+        blob = pack_embedding(embedding, self._embed_cache_quant)
+        self._cache_packed(key, blob)
+        return blob
     
-    async def generate_embeddings_batch(self, texts: List[str], model: str = "nomic-embed-text") -> List[List[float]]:
-        """Generate embeddings for multiple texts"""
+    def _cache_packed(self, key: bytes, blob: bytes) -> None:
+        """Store packed bytes, evicting the least recently used entries over capacity"""
+        self._embed_cache[key] = blob
+        self._embed_cache.move_to_end(key)
+        while len(self._embed_cache) > self._embed_cache_cap:
+            self._embed_cache.popitem(last=False)
+    
+    async def _embed_one(self, text: str, model: str) -> np.ndarray:
+        """Embed a single text via the legacy api/embeddings endpoint"""
+        logger.debug("Generating embedding for text of length %d", len(text))
+        
+        data = {
+            "model": model,
+            "prompt": text,
+            "keep_alive": self.keep_alive,
+        }
+        
+        response = await self._make_request("api/embeddings", data)
+        
+        embedding = response.get("embedding")
+        if not embedding:
+            raise OllamaError("No embedding returned from Ollama")
+        
+        logger.debug("Generated embedding of dimension %d", len(embedding))
+        return np.asarray(embedding, dtype=np.float32)
+    
+    async def _embed_batch_native(self, texts: List[str], model: str, keep_alive: Optional[str] = None) -> Optional[np.ndarray]:
+        """Embed several texts with one call to the api/embed endpoint; None if the response is unusable"""
+        response = await self._make_request(
+            "api/embed", {"model": model, "input": texts, "keep_alive": keep_alive or self.keep_alive}
+        )
+        
+        embeddings = response.get("embeddings")
+        if not embeddings or len(embeddings) != len(texts):
+            logger.warning("Native batch embedding returned no usable embeddings, falling back to per-text requests")
+            return None
+        return np.asarray(embeddings, dtype=np.float32)
+    
+    async def _embed_slice(self, texts: List[str], indices: List[int], model: str, embeddings: List[np.ndarray]) -> None:
+        """Embed one sub-batch natively, halving it on payload or resource pressure"""
+        try:
+            batch = await self._embed_batch_native([texts[i] for i in indices], model)
+        except OllamaError as e:
+            if (e.timed_out or e.status_code in (413, 500)) and len(indices) > 1:
+                half = (len(indices) + 1) // 2
+                logger.warning(f"Batch of {len(indices)} embeddings failed ({e}), retrying in batches of {half}")
+                await self._embed_slice(texts, indices[:half], model, embeddings)
+                await self._embed_slice(texts, indices[half:], model, embeddings)
+                return
+            logger.warning(f"Native batch embedding failed, falling back to per-text requests: {e}")
+            batch = None
+        
+        if batch is not None:
+            for i, embedding in zip(indices, batch):
+                embeddings[i] = embedding
+        else:
+            await self._embed_each(texts, indices, model, embeddings)
+    
+    async def _embed_each(self, texts: List[str], indices: List[int], model: str, embeddings: List[np.ndarray]) -> None:
+        """Embed texts one request each, with up to embed_concurrency requests in flight"""
+        semaphore = asyncio.Semaphore(self.embed_concurrency)
+        
+        async def _one(i: int) -> Tuple[int, np.ndarray]:
+            async with semaphore:
+                try:
+                    return i, await self._embed_one(texts[i], model)
+                except Exception as e:
+                    logger.error(f"Failed to generate embedding for text {i}: {e}")
+                    return i, _EMPTY_EMBEDDING
+        
+        for i, embedding in await asyncio.gather(*(_one(i) for i in indices)):
+            embeddings[i] = embedding
+    
+    async def generate_embeddings_batch(self, texts: List[str], model: str = "nomic-embed-text") -> List[np.ndarray]:
+        """Generate embeddings for multiple texts, preserving input order"""
         if not texts:
             return []
         
-        logger.info(f"Generating embeddings for {len(texts)} texts")
+        # Embed each distinct text once and scatter the vectors back to every position
+        positions: Dict[str, List[int]] = {}
+        for i, text in enumerate(texts):
+            positions.setdefault(text, []).append(i)
+        if len(positions) < len(texts):
+            logger.info("Deduplicated %d texts to %d unique", len(texts), len(positions))
+            unique_embeddings = await self.generate_embeddings_batch(list(positions), model)
+            embeddings: List[np.ndarray] = [_EMPTY_EMBEDDING] * len(texts)
+            for embedding, indices in zip(unique_embeddings, positions.values()):
+                for i in indices:
+                    embeddings[i] = embedding
+            return embeddings
+        
+        logger.info("Generating embeddings for %d texts", len(texts))
         
-        embeddings = []
+        # Ensure model name includes tag
+        if ":" not in model:
+            model = f"{model}:latest"
+        
+        # Failed or empty texts keep an empty embedding as placeholder
+        embeddings = [_EMPTY_EMBEDDING] * len(texts)
+        
+        # Serve cache hits directly; only misses go to Ollama
+        cache_keys: Dict[int, bytes] = {}
+        pending = []
         for i, text in enumerate(texts):
-            try:
-                embedding = await self.generate_embedding(text, model)
-                embeddings.append(embedding)
-                
-                if (i + 1) % 10 == 0:
-                    logger.info(f"Generated {i + 1}/{len(texts)} embeddings")
-                    
-            except Exception as e:
-                logger.error(f"Failed to generate embedding for text {i}: {e}")
-                # Add empty embedding as placeholder
-                embeddings.append([])
+            if not text.strip():
+                continue
+            cache_keys[i] = self._embed_cache_key(text, model)
+            cached = self._get_cached_embedding(cache_keys[i])
+            if cached is not None:
+                embeddings[i] = cached
+            else:
+                pending.append(i)
+        
+        # Then the disk cache, in one lookup for all in-memory misses
+        if pending and self._disk_cache is not None:
+            on_disk = await asyncio.to_thread(
+                self._disk_cache.get_many, model, [cache_keys[i] for i in pending]
+            )
+            if on_disk:
+                for i in pending:
+                    blob = on_disk.get(cache_keys[i])
+                    if blob is not None:
+                        embeddings[i] = unpack_embedding(blob, self._embed_cache_quant)
+                        self._cache_packed(cache_keys[i], blob)
+                pending = [i for i in pending if not len(embeddings[i])]
+        
+        if not pending:
+            logger.info("All %d embeddings served from cache", len(cache_keys))
+            return embeddings
         
-        logger.info(f"Completed embedding generation: {len([e for e in embeddings if e])} successful")
+        # Check model availability once for the whole batch
+        if not await self.check_model_availability(model):
+            logger.error(f"Embedding model '{model}' not available")
+            return embeddings
+        
+        # Sub-batches run concurrently, bounded like the per-text fallback
+        semaphore = asyncio.Semaphore(self.embed_concurrency)
+        
+        async def _run_slice(indices: List[int]) -> None:
+            async with semaphore:
+                await self._embed_slice(texts, indices, model, embeddings)
+        
+        await asyncio.gather(*(
+            _run_slice(pending[start:start + self.embed_batch_size])
+            for start in range(0, len(pending), self.embed_batch_size)
+        ))
+        
+        packed = {
+            cache_keys[i]: self._cache_embedding(cache_keys[i], embeddings[i])
+            for i in pending if len(embeddings[i])
+        }
+        if self._disk_cache is not None:
+            await asyncio.to_thread(self._disk_cache.put_many, model, packed)
+        
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Completed embedding generation: %d successful", sum(1 for e in embeddings if len(e)))
         return embeddings
     
-    async def generate_text(self, prompt: str, model: Optional[str] = None, max_tokens: int = 1000, db: Optional[AsyncSession] = None, is_refinement: bool = False) -> str:
+    async def generate_embeddings_array(self, texts: List[str], model: str = "nomic-embed-text") -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Generate embeddings for multiple texts as a dense matrix
+        
+        Returns:
+            Tuple of (float32 array of shape [N, D], boolean validity mask of shape [N]).
+            Rows for texts whose embedding failed are zero and flagged False in the mask.
+        """
+        embeddings = await self.generate_embeddings_batch(texts, model)
+        valid_mask = np.fromiter((len(e) > 0 for e in embeddings), dtype=bool, count=len(embeddings))
+        if not valid_mask.any():
+            return np.zeros((len(embeddings), 0), dtype=np.float32), valid_mask
+        
+        dimension = len(embeddings[int(np.argmax(valid_mask))])
+        matrix = np.zeros((len(embeddings), dimension), dtype=np.float32)
+        for i in np.flatnonzero(valid_mask):
+            matrix[i] = embeddings[i]
+        return matrix, valid_mask
+    
+    def _model_options(self, model: str) -> Dict[str, Any]:
+        """Generation options for a model: configured defaults plus any per-model overrides"""
+        overrides = self.model_options.get(model) or self.model_options.get(model.removesuffix(":latest"))
+        if not overrides:
+            return self.generation_options
+        return {**self.generation_options, **overrides}
+    
+    async def generate_text(self, prompt: str, model: Optional[str] = None, max_tokens: int = 1000, db: Optional[AsyncSession] = None, is_refinement: bool = False, keep_alive: Optional[str] = None) -> str:
         """Generate text using Ollama"""
+        try:
+            parts = [
+                token async for token in self.generate_text_stream(
+                    prompt, model=model, max_tokens=max_tokens, db=db, is_refinement=is_refinement, keep_alive=keep_alive
+                )
+            ]
+            generated_text = "".join(parts).strip()
+            if not generated_text:
+                raise OllamaError("No text generated")
+            
+            logger.debug("Generated %d characters", len(generated_text))
+            return generated_text
+            
+        except Exception as e:
+            logger.error(f"Failed to generate text: {e}")
+            raise
+    
+    async def generate_text_stream(self, prompt: str, model: Optional[str] = None, max_tokens: int = 1000, db: Optional[AsyncSession] = None, is_refinement: bool = False, keep_alive: Optional[str] = None) -> AsyncIterator[str]:
+        """Generate text using Ollama, yielding tokens as they arrive"""
         if not prompt.strip():
             raise ValueError("Prompt cannot be empty")
         
@@ -257,44 +611,50 @@ class OllamaClient:
         if ":" not in model:
             model = f"{model}:latest"
         
-        # Check if model is available
-        # Temporarily bypass model check for debugging
-        # if not await self.check_model_availability(model):
-        #     raise OllamaError(f"Text generation model '{model}' not available")
+        logger.info("🤖 Generating text with model: %s", model)
         
-        try:
-            logger.info(f"🤖 Generating text with model: {model}")
-            logger.debug(f"Generating text with model {model}")
-            
-            data = {
-                "model": model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "num_predict": max_tokens,
-                    "temperature": 0.7,
-                    "top_p": 0.9,
-                    "num_thread": 4,  # Optimize for M4 processor
-                    "repeat_penalty": 1.1,
-                    "top_k": 40,
-                    "num_ctx": 4096,  # Reasonable context window
-                }
+        data = {
+            "model": model,
+            "prompt": prompt,
+            "stream": True,
+            "keep_alive": keep_alive or self.keep_alive,
+            "options": {
+                **self._model_options(model),
+                "num_predict": max_tokens,
             }
-            
-            # Use shorter timeout for refinement tasks
-            timeout = self.refinement_timeout if is_refinement else self.generation_timeout
-            response = await self._make_request("api/generate", data, timeout=timeout)
-            
-            generated_text = response.get("response", "").strip()
-            if not generated_text:
-                raise OllamaError("No text generated")
-            
-            logger.debug(f"Generated {len(generated_text)} characters")
-            return generated_text
-            
-        except Exception as e:
-            logger.error(f"Failed to generate text: {e}")
-            raise
+        }
+        
+        # Use shorter timeout for refinement tasks
+        timeout = self.refinement_timeout if is_refinement else self.generation_timeout
+        try:
+            async with self.client.stream(
+                "POST",
+                "/api/generate",
+                content=orjson.dumps(data),
+                headers={"content-type": "application/json"},
+                timeout=timeout
+            ) as response:
+                if response.is_error:
+                    await response.aread()
+                    raise OllamaError(
+                        f"Ollama HTTP error {response.status_code}: {response.text}",
+                        status_code=response.status_code
+                    )
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = orjson.loads(line)
+                    if chunk.get("error"):
+                        raise OllamaError(f"Ollama generation failed: {chunk['error']}")
+                    token = chunk.get("response", "")
+                    if token:
+                        yield token
+                    if chunk.get("done"):
+                        break
+        except httpx.TimeoutException:
+            raise OllamaError("Ollama request timed out: api/generate", timed_out=True)
+        except httpx.HTTPError as e:
+            raise OllamaError(f"Ollama request failed: {str(e)}")
     
     async def summarize_text(self, text: str, max_length: int = 200) -> str:
         """Generate a summary of the text"""
@@ -327,6 +687,27 @@ Keywords:"""
             logger.error(f"Failed to extract keywords: {e}")
             return []
 
+    async def summarize_and_extract_keywords(self, text: str, max_length: int = 200, max_keywords: int = 10) -> Tuple[str, List[str]]:
+        """Generate a summary and keywords for the text with a single LLM call"""
+        prompt = f"""Summarize the following text in no more than {max_length} words and extract its {max_keywords} most important keywords.
+Respond ONLY with JSON in this exact format: {{"summary": "...", "keywords": ["...", "..."]}}
+
+{text}
+
+JSON:"""
+
+        try:
+            response = await self.generate_text(prompt, max_tokens=max_length * 2 + 100)
+            parsed = _parse_json_object(response)
+            summary = str(parsed.get("summary", "")).strip() or "Summary not available"
+            keywords = [str(kw).strip() for kw in parsed.get("keywords", []) if str(kw).strip()]
+            return summary, keywords[:max_keywords]
+        except Exception as e:
+            logger.warning(f"Combined summary/keywords generation failed, falling back to separate calls: {e}")
+            summary = await self.summarize_text(text, max_length)
+            keywords = await self.extract_keywords(text, max_keywords)
+            return summary, keywords
+
 
 # Global client instance
 ollama_client = OllamaClient()
\ No newline at end of file
@@ -2,57 +2,121 @@
 AI Agent orchestration using Pydantic AI for article generation workflow
 """
 
+from __future__ import annotations
+
 import asyncio
 import logging
-from typing import List, Dict, Any, Optional, Union
+import re
+import time
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple, Union
 from datetime import datetime
+from collections import deque
 from dataclasses import dataclass
 from enum import Enum
+from functools import lru_cache
+from itertools import islice
+
+from pydantic import BaseModel, Field, computed_field
 
-from pydantic import BaseModel, Field
-from pydantic_ai import Agent, RunContext
-from pydantic_ai.usage import Usage, UsageLimits
-from pydantic_ai.messages import ModelMessage
+from app.core.config import get_settings
+from app.services.pydantic_agents_models import (
+    ArticleOutline,
+    OutlineSection,
+    ResearchResult,
+    monotonic_ns_to_datetime,
+)
+
+if TYPE_CHECKING:
+    from pydantic_ai import Agent, RunContext
+    from pydantic_ai.usage import Usage, UsageLimits
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on research queries in flight at once, so fan-out doesn't overwhelm Ollama
+RESEARCH_CONCURRENCY = 8
+
+# Feedback classifiers: one case-insensitive scan finds every cue phrase, which maps to its category
+_OUTLINE_FEEDBACK_RE = re.compile(r"more detail|expand|shorter|concise|add", re.IGNORECASE)
+_OUTLINE_FEEDBACK_KINDS = {
+    "more detail": "expand",
+    "expand": "expand",
+    "shorter": "shorten",
+    "concise": "shorten",
+    "add": "add",
+}
+# Triage actions form a fixed vocabulary, so requested actions are tracked as a bitmask
+ACT_OUTLINE, ACT_RESEARCH, ACT_FOCUS, ACT_CLARIFY = 1, 2, 4, 8
+_ACTION_NAMES = (
+    (ACT_OUTLINE, "refine_outline"),
+    (ACT_RESEARCH, "additional_research"),
+    (ACT_FOCUS, "adjust_focus"),
+    (ACT_CLARIFY, "clarify_request"),
+)
+# Action names and summary text for every mask, in recommendation order
+_MASK_ACTIONS = tuple(
+    tuple(name for bit, name in _ACTION_NAMES if mask & bit) for mask in range(1 << len(_ACTION_NAMES))
+)
+_MASK_SUMMARIES = tuple(", ".join(actions) for actions in _MASK_ACTIONS)
 
-class AgentResponse(BaseModel):
-    """Standardized response format for all agents"""
-    status: str = "success"
-    data: Any = None
-    message: str = ""
-    agent_type: str = ""
-    timestamp: datetime = Field(default_factory=datetime.now)
+_TRIAGE_FEEDBACK_RE = re.compile(r"outline|structure|research|more information|topic|focus", re.IGNORECASE)
+_TRIAGE_FEEDBACK_BITS = {
+    "outline": ACT_OUTLINE,
+    "structure": ACT_OUTLINE,
+    "research": ACT_RESEARCH,
+    "more information": ACT_RESEARCH,
+    "topic": ACT_FOCUS,
+    "focus": ACT_FOCUS,
+}
 
 
-class ResearchResult(BaseModel):
-    """Research findings from knowledge base"""
-    query: str
-    relevant_chunks: List[Dict[str, Any]]
-    total_found: int
-    confidence_score: float = 0.0
+# Outline word budgets per target length: (total words, words per section)
+_WORD_TARGETS: Dict[str, Tuple[int, int]] = {
+    "short": (800, 150),
+    "medium": (1500, 250),
+    "long": (2500, 400),
+}
 
+_KEY_POINT_TEMPLATES = ("Key point 1 for {}...", "Key point 2 for {}...", "Key point 3 for {}...")
 
-class OutlineSection(BaseModel):
-    """Article outline section"""
-    title: str
-    description: str
-    key_points: List[str]
-    estimated_words: int = 200
+
+@lru_cache(maxsize=128)
+def _theme_key_points(short_theme: str) -> Tuple[str, ...]:
+    """Placeholder key points for a theme; shared safely since tuples are immutable"""
+    return tuple(template.format(short_theme) for template in _KEY_POINT_TEMPLATES)
+
+
+# Terms that mark research-grade content; one case-insensitive pass replaces lower() plus a scan per term
+_QUALITY_TERMS_RE = re.compile(r"research|study|analysis|data", re.IGNORECASE)
+_QUALITY_TERM_MIN_LENGTH = 4  # Shorter previews cannot contain any of the terms
 
 
-class ArticleOutline(BaseModel):
-    """Complete article outline"""
-    title: str
-    introduction: str
-    sections: List[OutlineSection]
-    conclusion: str
-    estimated_total_words: int
-    writing_suggestions: List[str] = []
+def _classify_feedback(feedback: str, pattern: re.Pattern, kinds: Dict[str, str]) -> set:
+    """Return the categories of all cue phrases found in the feedback"""
+    return {kinds[match.group().lower()] for match in pattern.finditer(feedback)}
 
 
-class OutlineRefinementSuggestion(BaseModel):
+class AgentResponse(BaseModel):
+    """
+    Standardized response format for all agents
+    
+    Unlike the msgspec AgentResponse in pydantic_agents_models this stays a Pydantic
+    model, since it is the agents' result_type.
+    """
+    status: str = "success"
+    data: Any = None
+    message: str = ""
+    agent_type: str = ""
+    # A monotonic int is cheaper to take than datetime.now(); converted only when read
+    timestamp_ns: int = Field(default_factory=time.monotonic_ns)
+    
+    @computed_field
+    @property
+    def timestamp(self) -> datetime:
+        return monotonic_ns_to_datetime(self.timestamp_ns)
+
+
+@dataclass(slots=True, frozen=True)
+class OutlineRefinementSuggestion:
     """Suggestions for improving the outline"""
     section_id: int
     suggestion_type: str  # "add", "modify", "remove", "reorder"
@@ -67,6 +131,16 @@ class ResearchRequest(BaseModel):
     depth_level: str = "comprehensive"  # "basic", "comprehensive", "detailed"
 
 
+def _ok(data: Any, message: str, agent_type: str) -> AgentResponse:
+    """Build a success response from trusted internal data, skipping validation"""
+    return AgentResponse.model_construct(status="success", data=data, message=message, agent_type=agent_type)
+
+
+def _error(message: str, agent_type: str) -> AgentResponse:
+    """Build an error response, skipping validation"""
+    return AgentResponse.model_construct(status="error", message=message, agent_type=agent_type)
+
+
 @dataclass
 class AgentDependencies:
     """Shared dependencies across all agents"""
@@ -78,11 +152,23 @@ class AgentDependencies:
     user_preferences: Dict[str, Any] = None
 
 
+@lru_cache(maxsize=1)
+def _load_pydantic_ai() -> None:
+    """
+    Import pydantic-ai when the first agent is built, so deployments using only the
+    simple orchestrator never load it. Tool annotations name RunContext, hence globals.
+    """
+    global Agent, RunContext
+    from pydantic_ai import Agent, RunContext
+
+
 # Research Agent - Finds and analyzes relevant content
-# Note: Agents are now created lazily to avoid initialization errors
-def create_research_agent():
+# Agents are built once on first use: construction compiles pydantic schemas for every tool
+@lru_cache(maxsize=1)
+def create_research_agent() -> Agent:
     """Create research agent with proper model configuration"""
-    return Agent(
+    _load_pydantic_ai()
+    agent = Agent(
         'openai:gpt-4o-mini',  # Will be replaced with Ollama model
         deps_type=AgentDependencies,
         result_type=AgentResponse,
@@ -99,10 +185,12 @@ def create_research_agent():
     Always use the available search tools to find the most relevant and recent information.
     Focus on accuracy, relevance, and comprehensiveness.
     """
-)
+    )
+    agent.tool(search_knowledge_base)
+    agent.tool(analyze_content_quality)
+    return agent
 
 
-@research_agent.tool
 async def search_knowledge_base(
     ctx: RunContext[AgentDependencies], 
     query: str, 
@@ -121,7 +209,6 @@ async def search_knowledge_base(
         return {"query": query, "matches": [], "total_found": 0, "error": str(e)}
 
 
-@research_agent.tool
 async def analyze_content_quality(
     ctx: RunContext[AgentDependencies], 
     content_chunks: List[Dict[str, Any]]
@@ -132,13 +219,15 @@ async def analyze_content_quality(
     
     # Simple quality analysis based on content length and preview quality
     total_chunks = len(content_chunks)
-    quality_indicators = 0
     
+    # One pass: each preview is read once and gets both checks
+    quality_indicators = 0.0
     for chunk in content_chunks:
         preview = chunk.get("preview", "")
-        if len(preview) > 100:  # Substantial content
+        preview_length = len(preview)
+        if preview_length > 100:  # Substantial content
             quality_indicators += 1
-        if any(term in preview.lower() for term in ["research", "study", "analysis", "data"]):
+        if preview_length >= _QUALITY_TERM_MIN_LENGTH and _QUALITY_TERMS_RE.search(preview):
             quality_indicators += 0.5
     
     quality_score = min(quality_indicators / total_chunks, 1.0) if total_chunks > 0 else 0.0
@@ -151,11 +240,15 @@ async def analyze_content_quality(
 
 
 # Outline Agent - Creates and refines article outlines
-outline_agent = Agent(
-    'openai:gpt-4o-mini',
-    deps_type=AgentDependencies,
-    result_type=AgentResponse,
-    system_prompt="""
+@lru_cache(maxsize=1)
+def create_outline_agent() -> Agent:
+    """Create outline agent with its outline tools registered"""
+    _load_pydantic_ai()
+    agent = Agent(
+        'openai:gpt-4o-mini',
+        deps_type=AgentDependencies,
+        result_type=AgentResponse,
+        system_prompt="""
     You are an Outline Agent specialized in creating comprehensive, well-structured article outlines.
     
     Your role:
@@ -171,10 +264,12 @@ outline_agent = Agent(
     - Engaging and reader-friendly
     - Appropriate for the target length and style
     """
-)
+    )
+    agent.tool(create_outline_from_research)
+    agent.tool(suggest_outline_improvements)
+    return agent
 
 
-@outline_agent.tool
 async def create_outline_from_research(
     ctx: RunContext[AgentDependencies],
     topic: str,
@@ -184,43 +279,33 @@ async def create_outline_from_research(
 ) -> ArticleOutline:
     """Create an article outline based on research findings"""
     
-    # Extract key themes from research
+    # Extract key themes from research; sections only ever show the first 50 characters
     key_themes = []
     if research_data.get("matches"):
-        for match in research_data["matches"][:5]:  # Focus on top matches
+        for match in islice(research_data["matches"], 5):  # Focus on top matches
             preview = match.get("preview", "")
             if preview:
-                key_themes.append(preview[:100] + "..." if len(preview) > 100 else preview)
+                key_themes.append(preview[:50])
     
-    # Define word targets based on length
-    word_targets = {
-        "short": {"total": 800, "section": 150},
-        "medium": {"total": 1500, "section": 250},
-        "long": {"total": 2500, "section": 400}
-    }
-    target = word_targets.get(target_length, word_targets["medium"])
+    # Word targets based on length
+    total_words, section_words = _WORD_TARGETS.get(target_length, _WORD_TARGETS["medium"])
     
     # Create sections based on research themes
     sections = []
-    if key_themes:
-        for i, theme in enumerate(key_themes[:6]):  # Max 6 sections
-            sections.append(OutlineSection(
-                title=f"Section {i+1}: {theme[:50]}...",
-                description=f"Detailed analysis of {theme[:30]}...",
-                key_points=[
-                    f"Key point 1 for {theme[:20]}...",
-                    f"Key point 2 for {theme[:20]}...",
-                    f"Key point 3 for {theme[:20]}..."
-                ],
-                estimated_words=target["section"]
-            ))
+    for i, theme in enumerate(key_themes[:6]):  # Max 6 sections
+        sections.append(OutlineSection(
+            title=f"Section {i+1}: {theme}...",
+            description=f"Detailed analysis of {theme[:30]}...",
+            key_points=_theme_key_points(theme[:20]),
+            estimated_words=section_words
+        ))
     
     return ArticleOutline(
         title=f"Comprehensive Guide to {topic}",
         introduction=f"An in-depth exploration of {topic} covering key aspects and insights.",
         sections=sections,
         conclusion=f"Summary and future implications of {topic}",
-        estimated_total_words=target["total"],
+        estimated_total_words=total_words,
         writing_suggestions=[
             f"Focus on {article_type} coverage",
             f"Target {target_length} length format",
@@ -230,7 +315,6 @@ async def create_outline_from_research(
     )
 
 
-@outline_agent.tool
 async def suggest_outline_improvements(
     ctx: RunContext[AgentDependencies],
     current_outline: ArticleOutline,
@@ -240,9 +324,9 @@ async def suggest_outline_improvements(
     suggestions = []
     
     # Parse user feedback for specific requests
-    feedback_lower = user_feedback.lower()
+    requested = _classify_feedback(user_feedback, _OUTLINE_FEEDBACK_RE, _OUTLINE_FEEDBACK_KINDS)
     
-    if "more detail" in feedback_lower or "expand" in feedback_lower:
+    if "expand" in requested:
         suggestions.append(OutlineRefinementSuggestion(
             section_id=0,
             suggestion_type="modify",
@@ -250,7 +334,7 @@ async def suggest_outline_improvements(
             reasoning="User requested more detailed coverage"
         ))
     
-    if "shorter" in feedback_lower or "concise" in feedback_lower:
+    if "shorten" in requested:
         suggestions.append(OutlineRefinementSuggestion(
             section_id=0,
             suggestion_type="modify",
@@ -258,7 +342,7 @@ async def suggest_outline_improvements(
             reasoning="User requested more concise structure"
         ))
     
-    if "add" in feedback_lower:
+    if "add" in requested:
         suggestions.append(OutlineRefinementSuggestion(
             section_id=len(current_outline.sections),
             suggestion_type="add",
@@ -270,11 +354,15 @@ async def suggest_outline_improvements(
 
 
 # Triage Agent - Orchestrates the overall workflow
-triage_agent = Agent(
-    'openai:gpt-4o-mini',
-    deps_type=AgentDependencies,
-    result_type=AgentResponse,
-    system_prompt="""
+@lru_cache(maxsize=1)
+def create_triage_agent() -> Agent:
+    """Create triage agent with the phase coordination tools registered"""
+    _load_pydantic_ai()
+    agent = Agent(
+        'openai:gpt-4o-mini',
+        deps_type=AgentDependencies,
+        result_type=AgentResponse,
+        system_prompt="""
     You are a Triage Agent responsible for orchestrating the article generation workflow.
     
     Your role:
@@ -290,40 +378,57 @@ triage_agent = Agent(
     - Outline completeness and structure
     - Overall workflow efficiency
     """
-)
+    )
+    agent.tool(coordinate_research_phase)
+    agent.tool(coordinate_outline_phase)
+    agent.tool(handle_user_feedback)
+    return agent
 
 
-@triage_agent.tool
 async def coordinate_research_phase(
     ctx: RunContext[AgentDependencies],
     research_request: ResearchRequest
 ) -> AgentResponse:
     """Coordinate the research phase using the research agent"""
     
-    # Run research agent for each query
-    research_results = []
-    
-    for query in research_request.specific_queries:
-        result = await research_agent.run(
-            f"Research the topic: {query}",
-            deps=ctx.deps,
-            usage=ctx.deps.usage
-        )
-        research_results.append(result.data)
+    # Run research agent for all queries concurrently
+    semaphore = asyncio.Semaphore(RESEARCH_CONCURRENCY)
+    
+    async def _research(query: str):
+        async with semaphore:
+            result = await create_research_agent().run(
+                f"Research the topic: {query}",
+                deps=ctx.deps,
+                usage=ctx.deps.usage
+            )
+            return result.data
+    
+    outcomes = await asyncio.gather(
+        *(_research(query) for query in research_request.specific_queries),
+        return_exceptions=True
+    )
     
-    return AgentResponse(
-        status="success",
-        data={
+    research_results = []
+    warnings = []
+    for query, outcome in zip(research_request.specific_queries, outcomes):
+        if isinstance(outcome, Exception):
+            logger.warning(f"Research query failed for '{query}': {outcome}")
+            warnings.append(f"Research query failed for '{query}': {outcome}")
+        else:
+            research_results.append(outcome)
+    
+    return _ok(
+        {
             "research_results": research_results,
             "main_topic": research_request.main_topic,
-            "queries_processed": len(research_request.specific_queries)
+            "queries_processed": len(research_request.specific_queries),
+            "warnings": warnings
         },
-        message=f"Research completed for {len(research_request.specific_queries)} queries",
-        agent_type="triage_research_coordinator"
+        f"Research completed for {len(research_request.specific_queries)} queries",
+        "triage_research_coordinator"
     )
 
 
-@triage_agent.tool
 async def coordinate_outline_phase(
     ctx: RunContext[AgentDependencies],
     topic: str,
@@ -338,21 +443,15 @@ async def coordinate_outline_phase(
     target_length = prefs.get("target_length", "medium")
     
     # Run outline agent
-    result = await outline_agent.run(
+    result = await create_outline_agent().run(
         f"Create an outline for: {topic}",
         deps=ctx.deps,
         usage=ctx.deps.usage
     )
     
-    return AgentResponse(
-        status="success",
-        data=result.data,
-        message="Outline created successfully",
-        agent_type="triage_outline_coordinator"
-    )
+    return _ok(result.data, "Outline created successfully", "triage_outline_coordinator")
 
 
-@triage_agent.tool
 async def handle_user_feedback(
     ctx: RunContext[AgentDependencies],
     feedback: str,
@@ -360,34 +459,39 @@ async def handle_user_feedback(
 ) -> AgentResponse:
     """Handle user feedback and determine next actions"""
     
-    feedback_lower = feedback.lower()
-    next_actions = []
-    
     # Determine what user wants to modify
-    if "outline" in feedback_lower or "structure" in feedback_lower:
-        next_actions.append("refine_outline")
-    
-    if "research" in feedback_lower or "more information" in feedback_lower:
-        next_actions.append("additional_research")
+    mask = 0
+    for match in _TRIAGE_FEEDBACK_RE.finditer(feedback):
+        mask |= _TRIAGE_FEEDBACK_BITS[match.group().lower()]
+    mask = mask or ACT_CLARIFY
     
-    if "topic" in feedback_lower or "focus" in feedback_lower:
-        next_actions.append("adjust_focus")
-    
-    if not next_actions:
-        next_actions.append("clarify_request")
-    
-    return AgentResponse(
-        status="success",
-        data={
+    return _ok(
+        {
             "feedback_analysis": feedback,
-            "recommended_actions": next_actions,
-            "requires_user_input": "clarify_request" in next_actions
+            "recommended_actions": list(_MASK_ACTIONS[mask]),
+            "requires_user_input": bool(mask & ACT_CLARIFY)
         },
-        message=f"Feedback analyzed. Recommended actions: {', '.join(next_actions)}",
-        agent_type="triage_feedback_handler"
+        f"Feedback analyzed. Recommended actions: {_MASK_SUMMARIES[mask]}",
+        "triage_feedback_handler"
     )
 
 
+@lru_cache(maxsize=1)
+def get_llm_semaphore() -> asyncio.Semaphore:
+    """
+    Process-wide limit on concurrent LLM calls
+    
+    Ollama decodes one batch at a time per model, so unbounded fan-out only queues
+    requests server-side and hurts tail latency.
+    """
+    return asyncio.Semaphore(get_settings().LLM_MAX_CONCURRENCY)
+
+
+def _latency_percentile_ms(sorted_latencies: List[float], percentile: float) -> float:
+    index = min(int(len(sorted_latencies) * percentile), len(sorted_latencies) - 1)
+    return round(sorted_latencies[index] * 1000, 1)
+
+
 class PydanticAgentOrchestrator:
     """Main orchestrator for the Pydantic AI agent workflow"""
     
@@ -395,9 +499,37 @@ class PydanticAgentOrchestrator:
         self.collection_id = collection_id
         self.search_function = search_function
         self.llm_function = llm_function
-        self.usage = Usage()
-        self.usage_limits = UsageLimits(request_limit=50, total_tokens_limit=100000)
-        
+        # Usage tracking is created with the first agent run, so workflows that
+        # never run an agent don't import pydantic-ai
+        self._usage: Optional[Usage] = None
+        self._usage_limits: Optional[UsageLimits] = None
+        # Seconds per recent LLM call, including time spent waiting for a slot
+        self.llm_latencies: deque = deque(maxlen=256)
+    
+    @property
+    def usage(self) -> Usage:
+        if self._usage is None:
+            from pydantic_ai.usage import Usage
+            self._usage = Usage()
+        return self._usage
+    
+    @property
+    def usage_limits(self) -> UsageLimits:
+        if self._usage_limits is None:
+            from pydantic_ai.usage import UsageLimits
+            self._usage_limits = UsageLimits(request_limit=50, total_tokens_limit=100000)
+        return self._usage_limits
+    
+    async def _llm(self, prompt: str, **kwargs) -> str:
+        """Call llm_function within the process-wide concurrency limit"""
+        start = time.perf_counter()
+        try:
+            async with get_llm_semaphore():
+                return await self.llm_function(prompt, **kwargs)
+        finally:
+            self.llm_latencies.append(time.perf_counter() - start)
+    
+
     def _create_dependencies(self, user_preferences: Optional[Dict[str, Any]] = None) -> AgentDependencies:
         """Create agent dependencies"""
         return AgentDependencies(
@@ -424,24 +556,20 @@ class PydanticAgentOrchestrator:
         if subtopics:
             queries.extend(subtopics)
         
-        research_request = ResearchRequest(
+        research_request = ResearchRequest.model_construct(
             main_topic=topic,
             specific_queries=queries,
             depth_level="comprehensive"
         )
         
         # Coordinate research
-        result = await triage_agent.run(
+        result = await create_triage_agent().run(
             f"Start research for: {topic}",
             deps=deps,
             usage=self.usage
         )
         
-        return result.data if result.data else AgentResponse(
-            status="error",
-            message="Research workflow failed",
-            agent_type="orchestrator"
-        )
+        return result.data if result.data else _error("Research workflow failed", "orchestrator")
     
     async def create_outline_workflow(
         self, 
@@ -453,17 +581,13 @@ class PydanticAgentOrchestrator:
         
         deps = self._create_dependencies(user_preferences)
         
-        result = await triage_agent.run(
+        result = await create_triage_agent().run(
             f"Create outline for: {topic} based on research",
             deps=deps,
             usage=self.usage
         )
         
-        return result.data if result.data else AgentResponse(
-            status="error",
-            message="Outline workflow failed",
-            agent_type="orchestrator"
-        )
+        return result.data if result.data else _error("Outline workflow failed", "orchestrator")
     
     async def handle_user_feedback_workflow(
         self, 
@@ -474,23 +598,31 @@ class PydanticAgentOrchestrator:
         
         deps = self._create_dependencies()
         
-        result = await triage_agent.run(
+        result = await create_triage_agent().run(
             f"Handle user feedback: {feedback}",
             deps=deps,
             usage=self.usage
         )
         
-        return result.data if result.data else AgentResponse(
-            status="error",
-            message="Feedback handling failed",
-            agent_type="orchestrator"
-        )
+        return result.data if result.data else _error("Feedback handling failed", "orchestrator")
     
     def get_usage_stats(self) -> Dict[str, Any]:
         """Get usage statistics"""
+        usage = self._usage
+        return {
+            "total_requests": usage.requests if usage else 0,
+            "total_tokens": (usage.total_tokens or 0) if usage else 0,
+            "request_tokens": (usage.request_tokens or 0) if usage else 0,
+            "response_tokens": (usage.response_tokens or 0) if usage else 0,
+            **self._llm_latency_stats()
+        }
+    
+    def _llm_latency_stats(self) -> Dict[str, Any]:
+        if not self.llm_latencies:
+            return {"llm_calls_sampled": 0}
+        latencies = sorted(self.llm_latencies)
         return {
-            "total_requests": self.usage.requests,
-            "total_tokens": self.usage.total_tokens,
-            "request_tokens": self.usage.request_tokens,
-            "response_tokens": self.usage.response_tokens
+            "llm_calls_sampled": len(latencies),
+            "llm_latency_p50_ms": _latency_percentile_ms(latencies, 0.50),
+            "llm_latency_p99_ms": _latency_percentile_ms(latencies, 0.99)
         }
\ No newline at end of file
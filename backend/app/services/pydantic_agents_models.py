@@ -0,0 +1,76 @@
+"""
+Data transfer objects shared by the agent workflows
+
+These are built only from trusted internal data, so none of them are Pydantic models:
+construction does no validation. Structs use gc=False to stay out of cyclic garbage
+collection; the outline types are stdlib dataclasses because pydantic-ai tools return
+them and pydantic can build schemas for dataclasses but not for msgspec Structs.
+"""
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+import msgspec
+
+# Wall-clock minus monotonic clock, captured once so timestamps can be stored as cheap monotonic ints
+_MONOTONIC_EPOCH_OFFSET_NS = time.time_ns() - time.monotonic_ns()
+
+
+def monotonic_ns_to_datetime(timestamp_ns: int) -> datetime:
+    """Convert a time.monotonic_ns() reading to a local wall-clock datetime"""
+    return datetime.fromtimestamp((timestamp_ns + _MONOTONIC_EPOCH_OFFSET_NS) / 1e9)
+
+
+class AgentResponse(msgspec.Struct, gc=False):
+    """Standardized response format for all agents"""
+    status: str = "success"
+    data: Any = None
+    message: str = ""
+    agent_type: str = ""
+    timestamp_ns: int = msgspec.field(default_factory=time.monotonic_ns)
+    
+    @property
+    def timestamp(self) -> datetime:
+        return monotonic_ns_to_datetime(self.timestamp_ns)
+
+
+class ResearchResult(msgspec.Struct, gc=False):
+    """Research findings from knowledge base"""
+    query: str
+    relevant_chunks: List[Dict[str, Any]]
+    total_found: int
+    confidence_score: float = 0.0
+
+
+@dataclass(slots=True, frozen=True)
+class OutlineSection:
+    """Article outline section"""
+    title: str
+    description: str
+    key_points: Tuple[str, ...]
+    estimated_words: int = 200
+
+
+@dataclass(slots=True)
+class ArticleOutline:
+    """Complete article outline"""
+    title: str
+    introduction: str
+    sections: List[OutlineSection]
+    conclusion: str
+    estimated_total_words: int
+    writing_suggestions: List[str] = field(default_factory=list)
+
+
+def response_to_dict(response: AgentResponse) -> Dict[str, Any]:
+    """
+    Shallow dict of a response for embedding in a larger payload
+    
+    Nested values are not copied; the enclosing payload is expected to go to a
+    JSON encoder such as msgspec's, which serializes them in one pass.
+    """
+    payload = msgspec.structs.asdict(response)
+    payload["timestamp"] = response.timestamp
+    return payload
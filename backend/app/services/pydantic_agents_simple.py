@@ -3,57 +3,174 @@ Simplified AI Agent orchestration for article generation workflow
 """
 
 import asyncio
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+import time
+from collections import OrderedDict
+from itertools import islice
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 
-from pydantic import BaseModel, Field
+import msgspec
+
+from app.services.pydantic_agents import PydanticAgentOrchestrator as AgentWorkflowOrchestrator, get_llm_semaphore
+from app.services.pydantic_agents_models import AgentResponse, ArticleOutline, OutlineSection, ResearchResult
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on research queries in flight at once, so fan-out doesn't overwhelm the backends
+RESEARCH_CONCURRENCY = 8
+MAX_RESEARCH_CHUNKS = 20  # Distinct chunks handed on to outline generation
+
+LLM_CACHE_SIZE = 1024
+LLM_CACHE_TTL = 3600.0  # Seconds a cached LLM response stays valid
+
+# LLM responses keyed by prompt hash, shared by all sessions: key -> (response, stored_at)
+_llm_response_cache: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+
+
+# Static instructions lead each prompt so the identical prefix can be reused from the
+# model server's prompt cache; only the tail after them changes between requests
+SYSTEM_OUTLINE_INSTRUCTIONS = """Create a comprehensive article outline for the topic given below, based on the research context that follows it.
+
+Please create a detailed outline with:
+1. An engaging title
+2. A compelling introduction
+3. 4-6 main sections with descriptions and key points
+4. A strong conclusion
+
+Format as a structured outline with clear sections and subsections."""
+
+SYSTEM_FEEDBACK_INSTRUCTIONS = """Analyze the user feedback given below and determine the appropriate action.
+
+Based on the feedback, should we:
+1. Refine the research (add more sources, different focus)
+2. Modify the outline (structure, content, emphasis)
+3. Adjust the writing style or approach
+4. Other specific changes
+
+Provide a clear action plan and any specific instructions."""
 
-class AgentResponse(BaseModel):
-    """Standardized response format for all agents"""
-    status: str = "success"
-    data: Any = None
-    message: str = ""
-    agent_type: str = ""
-    timestamp: datetime = Field(default_factory=datetime.now)
 
+def _prompt_cache_key(prompt: str, max_tokens: int, model: str = "") -> str:
+    """Stable key for an LLM call; blake2b is faster than sha256 for short inputs"""
+    return hashlib.blake2b(f"{model}\0{max_tokens}\0{prompt}".encode(), digest_size=16).hexdigest()
 
-class ResearchResult(BaseModel):
-    """Research findings from knowledge base"""
-    query: str
-    relevant_chunks: List[Dict[str, Any]]
-    total_found: int
-    confidence_score: float = 0.0
 
+def clear_llm_response_cache() -> None:
+    """Drop every cached LLM response; call after the model settings change"""
+    _llm_response_cache.clear()
 
-class OutlineSection(BaseModel):
-    """Article outline section"""
-    title: str
-    description: str
-    key_points: List[str]
-    estimated_words: int = 200
 
+def _chunk_identity(match: Dict[str, Any]) -> Any:
+    """Identify a search match by chunk id, falling back to a hash of its text"""
+    chunk_id = match.get("chunk_id") or match.get("id")
+    if chunk_id is not None:
+        return chunk_id
+    return hashlib.blake2b((match.get("text") or "").encode(), digest_size=8).digest()
 
-class ArticleOutline(BaseModel):
-    """Complete article outline"""
-    title: str
-    introduction: str
-    sections: List[OutlineSection]
-    conclusion: str
-    estimated_total_words: int
 
+def _ok(data: Any, message: str, agent_type: str) -> AgentResponse:
+    """Build a success response"""
+    return AgentResponse(status="success", data=data, message=message, agent_type=agent_type)
 
-class PydanticAgentOrchestrator:
-    """Main orchestrator for the AI agent workflow using our existing services"""
+
+def _error(message: str, agent_type: str) -> AgentResponse:
+    """Build an error response"""
+    return AgentResponse(status="error", message=message, agent_type=agent_type)
+
+
+class PydanticAgentOrchestrator(AgentWorkflowOrchestrator):
+    """
+    Main orchestrator for the AI agent workflow using our existing services
+    
+    Overrides the three workflows to call the search and LLM functions directly
+    instead of going through pydantic-ai agents.
+    """
     
-    def __init__(self, collection_id: int, search_function, llm_function):
-        self.collection_id = collection_id
-        self.search_function = search_function
-        self.llm_function = llm_function
+    def __init__(self, collection_id: int, search_function, llm_function, llm_stream_function=None, search_function_batch=None, model_name_function=None):
+        super().__init__(collection_id, search_function, llm_function)
+        # Optional async model_name_function() -> the model llm_function will use, so
+        # cached responses from one model are never served for another
+        self.model_name_function = model_name_function
+        # Optional search_function_batch(collection_id, queries) -> one result per query, in a single round trip
+        self.search_function_batch = search_function_batch
+        # Optional token-streaming variant of llm_function, e.g. OllamaClient.generate_text_stream
+        self.llm_stream_function = llm_stream_function
+        self.llm_cache_hits = 0
+        self.llm_cache_misses = 0
+    
+    def _cache_lookup(self, key: str) -> Optional[str]:
+        """Return a recent cached LLM response, counting the hit or miss"""
+        entry = _llm_response_cache.get(key)
+        if entry is not None and time.monotonic() - entry[1] < LLM_CACHE_TTL:
+            _llm_response_cache.move_to_end(key)
+            self.llm_cache_hits += 1
+            return entry[0]
+        self.llm_cache_misses += 1
+        return None
+    
+    @staticmethod
+    def _cache_store(key: str, response: str) -> None:
+        _llm_response_cache[key] = (response, time.monotonic())
+        _llm_response_cache.move_to_end(key)
+        if len(_llm_response_cache) > LLM_CACHE_SIZE:
+            _llm_response_cache.popitem(last=False)
+    
+    async def _cache_key(self, prompt: str, max_tokens: int) -> str:
+        model = await self.model_name_function() if self.model_name_function is not None else ""
+        return _prompt_cache_key(prompt, max_tokens, model)
+    
+    async def _cached_llm(self, prompt: str, max_tokens: int) -> str:
+        """Call the LLM, reusing a recent response for an identical prompt"""
+        key = await self._cache_key(prompt, max_tokens)
+        cached = self._cache_lookup(key)
+        if cached is not None:
+            return cached
+        response = await self._llm(prompt, max_tokens=max_tokens)
+        self._cache_store(key, response)
+        return response
+    
+    async def _stream_llm(self, prompt: str, max_tokens: int) -> AsyncIterator[str]:
+        """Yield LLM output as it is generated; a cached response arrives as one chunk"""
+        if self.llm_stream_function is None:
+            yield await self._cached_llm(prompt, max_tokens)
+            return
+        key = await self._cache_key(prompt, max_tokens)
+        cached = self._cache_lookup(key)
+        if cached is not None:
+            yield cached
+            return
+        parts = []
+        start = time.perf_counter()
+        try:
+            async with get_llm_semaphore():
+                async for token in self.llm_stream_function(prompt, max_tokens=max_tokens):
+                    parts.append(token)
+                    yield token
+        finally:
+            self.llm_latencies.append(time.perf_counter() - start)
+        response = "".join(parts).strip()
+        if not response:
+            raise ValueError("No text generated")
+        self._cache_store(key, response)
+    
+    async def _search_all(self, queries: List[str]) -> List[Any]:
+        """Run every research query, returning a result or exception per query"""
+        if self.search_function_batch is not None:
+            try:
+                return await self.search_function_batch(self.collection_id, queries)
+            except Exception as e:
+                logger.warning(f"Batched research search failed, searching queries individually: {e}")
+        
+        # Otherwise use the existing search function, all queries concurrently
+        semaphore = asyncio.Semaphore(RESEARCH_CONCURRENCY)
         
+        async def _search(query: str):
+            async with semaphore:
+                return await self.search_function(self.collection_id, query)
+        
+        return await asyncio.gather(*(_search(query) for query in queries), return_exceptions=True)
+    
     async def start_research_workflow(
         self, 
         topic: str, 
@@ -70,41 +187,40 @@ class PydanticAgentOrchestrator:
             if subtopics:
                 queries.extend(subtopics)
             
-            # Perform research using existing search function
+            outcomes = await self._search_all(queries)
+            
+            # Overlapping queries return the same chunks; keep each chunk once
             research_results = []
-            total_chunks = 0
+            seen_chunks = set()
             
-            for query in queries:
-                try:
-                    result = await self.search_function(self.collection_id, query)
-                    if result and result.get("matches"):
-                        research_results.extend(result["matches"])
-                        total_chunks += len(result["matches"])
-                except Exception as e:
-                    logger.warning(f"Research query failed for '{query}': {e}")
+            for query, result in zip(queries, outcomes):
+                if isinstance(result, Exception):
+                    logger.warning(f"Research query failed for '{query}': {result}")
+                elif result and result.get("matches"):
+                    for match in result["matches"]:
+                        chunk_key = _chunk_identity(match)
+                        if chunk_key not in seen_chunks:
+                            seen_chunks.add(chunk_key)
+                            research_results.append(match)
+            total_chunks = len(research_results)
             
             # Create research result
             research_data = ResearchResult(
                 query=topic,
-                relevant_chunks=research_results[:20],  # Limit to top 20
+                relevant_chunks=research_results[:MAX_RESEARCH_CHUNKS],
                 total_found=total_chunks,
                 confidence_score=min(total_chunks / 10.0, 1.0)  # Simple confidence metric
             )
             
-            return AgentResponse(
-                status="success",
-                data=research_data.model_dump(),
-                message=f"Research completed: Found {total_chunks} relevant chunks",
-                agent_type="research"
+            return _ok(
+                msgspec.structs.asdict(research_data),
+                f"Research completed: Found {total_chunks} relevant chunks",
+                "research"
             )
             
         except Exception as e:
             logger.error(f"Research workflow failed: {e}")
-            return AgentResponse(
-                status="error",
-                message=f"Research workflow failed: {str(e)}",
-                agent_type="research"
-            )
+            return _error(f"Research workflow failed: {str(e)}", "research")
     
     async def create_outline_workflow(
         self, 
@@ -112,7 +228,24 @@ class PydanticAgentOrchestrator:
         research_data: Dict[str, Any],
         user_preferences: Optional[Dict[str, Any]] = None
     ) -> AgentResponse:
-        """Create outline workflow using LLM"""
+        """Create outline workflow using LLM, returning only the final response"""
+        result = None
+        async for result in self.create_outline_workflow_stream(topic, research_data, user_preferences):
+            pass
+        return result
+    
+    async def create_outline_workflow_stream(
+        self, 
+        topic: str, 
+        research_data: Dict[str, Any],
+        user_preferences: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[AgentResponse]:
+        """
+        Create outline workflow using LLM, streaming the outline as it is generated
+        
+        Yields "partial" responses carrying {"outline_partial": chunk} and ends with
+        the same final response create_outline_workflow returns.
+        """
         
         try:
             logger.info(f"Creating outline for topic: {topic}")
@@ -120,43 +253,32 @@ class PydanticAgentOrchestrator:
             # Prepare research context
             research_context = ""
             if research_data and research_data.get("relevant_chunks"):
-                chunks = research_data["relevant_chunks"][:10]  # Use top 10 chunks
-                research_context = "\n".join([
-                    f"- {chunk.get('text', '')[:200]}..." 
+                chunks = islice(research_data["relevant_chunks"], 10)  # Use top 10 chunks
+                research_context = "\n".join(
+                    f"- {(chunk.get('text') or '')[:200]}..."
                     for chunk in chunks
-                ])
+                )
             
-            # Create outline prompt
-            outline_prompt = f"""Based on the research below, create a comprehensive article outline for the topic: {topic}
-
-Research Context:
-{research_context}
-
-Please create a detailed outline with:
-1. An engaging title
-2. A compelling introduction
-3. 4-6 main sections with descriptions and key points
-4. A strong conclusion
-
-Format as a structured outline with clear sections and subsections."""
+            # Create outline prompt: fixed instructions first, request-specific content last
+            outline_prompt = f"{SYSTEM_OUTLINE_INSTRUCTIONS}\n\nTopic: {topic}\n\nResearch Context:\n{research_context}"
             
             # Generate outline using LLM
-            outline_text = await self.llm_function(outline_prompt, max_tokens=800)
+            parts = []
+            async for chunk in self._stream_llm(outline_prompt, max_tokens=800):
+                parts.append(chunk)
+                yield AgentResponse(
+                    status="partial",
+                    data={"outline_partial": chunk, "topic": topic},
+                    message="Outline in progress",
+                    agent_type="outline"
+                )
+            outline_text = "".join(parts).strip()
             
-            return AgentResponse(
-                status="success",
-                data={"outline": outline_text, "topic": topic},
-                message="Outline created successfully",
-                agent_type="outline"
-            )
+            yield _ok({"outline": outline_text, "topic": topic}, "Outline created successfully", "outline")
             
         except Exception as e:
             logger.error(f"Outline workflow failed: {e}")
-            return AgentResponse(
-                status="error",
-                message=f"Outline workflow failed: {str(e)}",
-                agent_type="outline"
-            )
+            yield _error(f"Outline workflow failed: {str(e)}", "outline")
     
     async def handle_user_feedback_workflow(
         self, 
@@ -169,42 +291,25 @@ Format as a structured outline with clear sections and subsections."""
             logger.info(f"Processing user feedback: {feedback[:100]}...")
             
             # Analyze feedback and determine action
-            feedback_prompt = f"""Analyze this user feedback and determine the appropriate action:
-
-User Feedback: {feedback}
-Current State: {current_state.get('phase', 'unknown')}
-
-Based on the feedback, should we:
-1. Refine the research (add more sources, different focus)
-2. Modify the outline (structure, content, emphasis)
-3. Adjust the writing style or approach
-4. Other specific changes
-
-Provide a clear action plan and any specific instructions."""
+            feedback_prompt = (
+                f"{SYSTEM_FEEDBACK_INSTRUCTIONS}\n\n"
+                f"User Feedback: {feedback}\n"
+                f"Current State: {current_state.get('phase', 'unknown')}"
+            )
             
             # Generate feedback analysis
-            action_plan = await self.llm_function(feedback_prompt, max_tokens=400)
+            action_plan = await self._cached_llm(feedback_prompt, max_tokens=400)
             
-            return AgentResponse(
-                status="success",
-                data={"action_plan": action_plan, "feedback": feedback},
-                message="Feedback processed successfully",
-                agent_type="feedback"
-            )
+            return _ok({"action_plan": action_plan, "feedback": feedback}, "Feedback processed successfully", "feedback")
             
         except Exception as e:
             logger.error(f"Feedback workflow failed: {e}")
-            return AgentResponse(
-                status="error",
-                message=f"Feedback handling failed: {str(e)}",
-                agent_type="feedback"
-            )
+            return _error(f"Feedback handling failed: {str(e)}", "feedback")
     
     def get_usage_stats(self) -> Dict[str, Any]:
         """Get usage statistics"""
         return {
-            "total_requests": 0,  # Placeholder - would track actual usage
-            "total_tokens": 0,
-            "request_tokens": 0,
-            "response_tokens": 0
+            **super().get_usage_stats(),
+            "llm_cache_hits": self.llm_cache_hits,
+            "llm_cache_misses": self.llm_cache_misses
         }
\ No newline at end of file
@@ -0,0 +1,149 @@
+"""
+Semantic caches that reuse stored results for inputs with near-identical meaning
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.services.ollama_client import ollama_client
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_TTL = 3600.0  # Seconds a cached LLM response stays valid
+
+
+class SemanticCache:
+    """
+    Returns a stored result when a new input's embedding is close enough to a cached one
+
+    Normalized vectors are rows of one preallocated float32 matrix, so a lookup is a
+    single matrix-vector product (exact inner-product search, i.e. cosine similarity).
+    The least recently used entry is evicted when full; with a ttl, entries older than
+    ttl seconds no longer match.
+    """
+
+    def __init__(self, threshold: float = 0.92, maxsize: int = 512, ttl: Optional[float] = None):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # Matrix row -> cached value, in least to most recently used order
+        self._values: "OrderedDict[int, Any]" = OrderedDict()
+        # Allocated on the first store, once the embedding dimension is known
+        self._matrix: Optional[np.ndarray] = None
+        self._stored_at = np.zeros(max(maxsize, 0), dtype=np.float64)
+
+    @staticmethod
+    def normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, vector: np.ndarray) -> Optional[Any]:
+        if not self._values or vector.shape[0] != self._matrix.shape[1]:
+            return None
+        rows = np.fromiter(self._values, dtype=np.intp, count=len(self._values))
+        if self.ttl is not None:
+            rows = rows[self._stored_at[rows] > time.monotonic() - self.ttl]
+            if not rows.size:
+                return None
+        scores = self._matrix[rows] @ vector
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        row = int(rows[best])
+        self._values.move_to_end(row)
+        return self._values[row]
+
+    def store(self, vector: np.ndarray, value: Any):
+        if self.maxsize <= 0:
+            return
+        if self._matrix is None or vector.shape[0] != self._matrix.shape[1]:
+            # First store, or the embedding model changed dimension: start over
+            self._matrix = np.zeros((self.maxsize, vector.shape[0]), dtype=np.float32)
+            self._values.clear()
+        if len(self._values) < self.maxsize:
+            row = len(self._values)
+        else:
+            row, _ = self._values.popitem(last=False)
+        self._matrix[row] = vector
+        self._stored_at[row] = time.monotonic()
+        self._values[row] = value
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+async def _embed_with_default_model(text: str) -> np.ndarray:
+    return await ollama_client.generate_embedding(text, get_settings().DEFAULT_EMBEDDING_MODEL)
+
+
+class SemanticLLMCache:
+    """
+    LLM function wrapper that reuses a stored response for a near-identical prompt
+
+    Only prompts with the same max_tokens are compared. Refinement calls always reach
+    the LLM, since a rewrite must reflect the latest feedback. Only wrap calls whose
+    prompts differ substantially when their answers should: prompts built from one
+    long template around a short varying part (e.g. per-section writing) embed too
+    closely to tell apart.
+    """
+
+    def __init__(
+        self,
+        llm_function: Callable[..., Awaitable[str]],
+        embed_function: Callable[[str], Awaitable[Any]] = _embed_with_default_model,
+        threshold: Optional[float] = None,
+        max_entries: Optional[int] = None
+    ):
+        settings = get_settings()
+        self.llm_function = llm_function
+        self.embed_function = embed_function
+        self.threshold = settings.SEMANTIC_CACHE_THRESHOLD if threshold is None else threshold
+        self.max_entries = settings.SEMANTIC_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.hits = 0
+        self.misses = 0
+        # One index per max_tokens value
+        self._caches: Dict[int, SemanticCache] = {}
+
+    async def __call__(self, prompt: str, max_tokens: int = 1000, is_refinement: bool = False) -> str:
+        if is_refinement or self.max_entries <= 0:
+            return await self.llm_function(prompt, max_tokens=max_tokens, is_refinement=is_refinement)
+
+        vector = await self._embed(prompt)
+        cache = self._caches.get(max_tokens)
+        if vector is not None and cache is not None:
+            cached = cache.lookup(vector)
+            if cached is not None:
+                self.hits += 1
+                logger.info("♻️ Semantic LLM cache hit")
+                return cached
+
+        self.misses += 1
+        response = await self.llm_function(prompt, max_tokens=max_tokens, is_refinement=is_refinement)
+        if vector is not None:
+            if cache is None:
+                cache = self._caches[max_tokens] = SemanticCache(self.threshold, self.max_entries, LLM_CACHE_TTL)
+            cache.store(vector, response)
+        return response
+
+    async def _embed(self, prompt: str) -> Optional[np.ndarray]:
+        """Normalized prompt embedding, or None if embedding fails (the call then goes uncached)"""
+        try:
+            return SemanticCache.normalize(await self.embed_function(prompt))
+        except Exception as e:
+            logger.warning(f"Semantic cache embedding failed, calling the LLM directly: {e}")
+            return None
+
+    def get_stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": sum(len(cache) for cache in self._caches.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
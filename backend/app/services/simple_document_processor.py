@@ -5,21 +5,96 @@ Uses Apache Tika for reliable text extraction.
 """
 
 import asyncio
+import aiofiles
 import aiohttp
 import hashlib
 import logging
+import mimetypes
+import os
+import time
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, select
+import numpy as np
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
 
 from app.models.knowledge_base import KBDocument, KBChunk, DocumentStatus
 from app.services.text_processing import DocumentProcessor as TextProcessor
-from app.services.ollama_client import OllamaClient
-from app.services.vector_store import MilvusVectorStore
+from app.services.ollama_client import ollama_client
+from app.services.vector_store import VectorStoreError, vector_store
 
 logger = logging.getLogger(__name__)
 
+EMBED_MAX_RETRIES = 3
+MILVUS_INSERT_BATCH_SIZE = 10_000  # Rows per Milvus insert call
+DOCUMENT_CONCURRENCY = 4  # Documents processed in parallel by process_multiple_documents
+PROGRESS_MIN_INTERVAL = 0.1  # Seconds between progress callbacks
+TIKA_UPLOAD_CHUNK_SIZE = 64 * 1024
+_TIKA_HEADERS = {'Accept': 'text/plain', 'Content-Type': 'application/octet-stream'}
+# connect/sock_read bounds make an unreachable or hung Tika fail well before the total limit
+_TIKA_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=5, sock_read=25)
+HASH_BUFFER_SIZE = 1 << 20  # 1 MiB reads keep hashing close to memory bandwidth
+_EMPTY_EMBEDDING = np.empty(0, dtype=np.float32)
+
+mimetypes.init()
+
+
+class MissingEmbeddingsError(Exception):
+    """Raised when a batch comes back with some embeddings still missing, to trigger a retry"""
+    pass
+
+
+def _log_retry(retry_state: RetryCallState) -> None:
+    """Log a failed attempt before tenacity sleeps and retries"""
+    logger.warning(
+        f"⚠️ Attempt {retry_state.attempt_number} failed, retrying in "
+        f"{retry_state.next_action.sleep:.1f}s: {retry_state.outcome.exception()}"
+    )
+
+
+@lru_cache(maxsize=64)
+def _mime_type_for_suffix(suffix: str) -> str:
+    """MIME type for a file extension; uploads share only a handful of extensions"""
+    mime_type, _ = mimetypes.guess_type(f"file{suffix}")
+    return mime_type or "application/octet-stream"
+
+
+def _advise_sequential(fd: int) -> None:
+    """Tell the kernel a file will be read front to back so it reads ahead aggressively (Linux only)"""
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+
+
+def _hash_file_sync(file_path: Path) -> str:
+    """SHA256 of a file (blocking; run in a worker thread)"""
+    hash_sha256 = hashlib.sha256()
+    with open(file_path, "rb", buffering=0) as f:
+        _advise_sequential(f.fileno())
+        for chunk in iter(lambda: f.read(HASH_BUFFER_SIZE), b""):
+            hash_sha256.update(chunk)
+    return hash_sha256.hexdigest()
+
+
+async def _file_iter(file_path: Path, chunk_size: int = TIKA_UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Read a file in chunks without blocking the event loop, for streaming uploads"""
+    async with aiofiles.open(file_path, 'rb') as f:
+        _advise_sequential(f.fileno())
+        while chunk := await f.read(chunk_size):
+            yield chunk
+
+
 class SimpleDocumentProcessor:
     """
     Simplified document processor inspired by Open WebUI's approach.
@@ -30,11 +105,14 @@ class SimpleDocumentProcessor:
     4. Robust error handling
     """
     
+    # Shared by every processor instance so Tika connections are pooled across requests
+    _http_session: Optional[aiohttp.ClientSession] = None
+    
     def __init__(self):
         self.tika_url = "http://localhost:9998"
         self.text_processor = TextProcessor()
-        self.ollama_client = OllamaClient()
-        self.vector_store = MilvusVectorStore()
+        self.ollama_client = ollama_client
+        self.vector_store = vector_store
     
     async def process_document(
         self,
@@ -42,55 +120,53 @@ class SimpleDocumentProcessor:
         collection_id: int,
         db: AsyncSession,
         original_filename: str = None,
-        mime_type: str = None
+        mime_type: str = None,
+        embedding_model: Optional[str] = None,
+        commit: bool = True
     ) -> Dict[str, Any]:
         """
         Process a single document using Open WebUI's proven approach.
         Returns immediate results without complex job tracking.
+        Callers processing several files can resolve embedding_model once and pass it in.
+        With commit=False nothing is committed, leaving the transaction to the caller
+        (e.g. one savepoint per file and a single commit per batch), and failures are
+        raised so the caller's savepoint rolls back instead of being released.
         """
         try:
             logger.info(f"Processing document: {file_path}")
             
-            # Step 1: Calculate file hash for deduplication
-            file_hash = await self._calculate_file_hash(file_path)
-            
-            # Step 2: Check for duplicates and replace if exists
-            existing_doc_result = await db.execute(
-                select(KBDocument).where(
+            # Step 1: Cheap precheck - a duplicate must have the same size
+            size_bytes = file_path.stat().st_size
+            same_size = await db.scalar(
+                select(1).where(
                     KBDocument.collection_id == collection_id,
-                    KBDocument.sha256 == file_hash
-                )
+                    KBDocument.size_bytes == size_bytes
+                ).limit(1)
             )
-            existing_doc = existing_doc_result.scalar_one_or_none()
             
-            if existing_doc:
-                logger.info(f"🔄 Found existing document {existing_doc.id} - replacing it with new version")
-
-                # Delete existing chunks from SQL and vector store
-                existing_chunks_result = await db.execute(
-                    select(KBChunk).where(KBChunk.document_id == existing_doc.id)
+            if same_size:
+                # Step 2: Calculate file hash, check for duplicates and replace if exists
+                file_hash = await self._calculate_file_hash(file_path)
+                existing_doc_result = await db.execute(
+                    select(KBDocument).where(
+                        KBDocument.collection_id == collection_id,
+                        KBDocument.sha256 == file_hash
+                    )
                 )
-                existing_chunks = existing_chunks_result.scalars().all()
-                
-                # Remove from vector store if connected
-                if self.vector_store._connected and existing_chunks:
-                    try:
-                        deleted_count = await self.vector_store.delete_document_embeddings(collection_id, existing_doc.id)
-                        logger.info(f"🗑️ Removed {deleted_count} embeddings from vector store")
-                    except Exception as e:
-                        logger.warning(f"Failed to remove embeddings from vector store: {e}")
+                existing_doc = existing_doc_result.scalar_one_or_none()
                 
-                # Delete chunks from SQL
-                for chunk in existing_chunks:
-                    await db.delete(chunk)
+                if existing_doc:
+                    await self._remove_existing_document(db, collection_id, existing_doc)
                 
-                # Delete the document
-                await db.delete(existing_doc)
-                await db.flush()
-                logger.info(f"🗑️ Removed existing document and {len(existing_chunks)} chunks")
-            
-            # Step 3: Extract text using Apache Tika (Open WebUI's approach)
-            text_content = await self._extract_text_with_tika(file_path)
+                # Step 3: Extract text using Apache Tika (Open WebUI's approach)
+                text_content = await self._extract_text_with_tika(file_path)
+            else:
+                # No document of this size, so not a duplicate. The hash is still stored
+                # for later dedup, but it no longer delays text extraction.
+                text_content, file_hash = await asyncio.gather(
+                    self._extract_text_with_tika(file_path),
+                    self._calculate_file_hash(file_path)
+                )
             
             if not text_content.strip():
                 return {
@@ -104,7 +180,7 @@ class SimpleDocumentProcessor:
                 collection_id=collection_id,
                 filename=file_path.name,
                 original_filename=original_filename or file_path.name,
-                size_bytes=file_path.stat().st_size,
+                size_bytes=size_bytes,
                 sha256=file_hash,
                 file_path=str(file_path),
                 mime_type=mime_type or self._get_mime_type(file_path),
@@ -112,98 +188,64 @@ class SimpleDocumentProcessor:
             )
             
             db.add(document)
-            await db.flush()  # Get document ID
             
-            # Step 5: Chunk the text
-            chunks = self.text_processor.create_chunks(text_content)
+            # Step 5: Chunk the text (CPU-bound, so off the event loop)
+            chunks = await asyncio.to_thread(self.text_processor.create_chunks, text_content)
             
             # Step 6: Generate embeddings and store chunks
             logger.info(f"📊 Processing {len(chunks)} chunks for {original_filename or file_path.name}")
-            embedding_model = await self.ollama_client.get_user_embedding_model(db)
+            embedding_model = embedding_model or await self.ollama_client.get_user_embedding_model(db)
             logger.info(f"🎯 Using embedding model: {embedding_model}")
-            stored_chunks = 0
             
-            # Ensure vector store is connected with retry
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    if not self.vector_store._connected:
-                        await self.vector_store.connect()
-                    break
-                except Exception as e:
-                    logger.warning(f"Milvus connection attempt {attempt + 1}/{max_retries} failed: {e}")
-                    if attempt == max_retries - 1:
-                        raise
-                    await asyncio.sleep(2)  # Wait before retry
+            embeddings, valid_mask = await self._embed_chunks([chunk.text for chunk in chunks], embedding_model)
+            embedded = [(i, chunks[i], embeddings[i]) for i in np.flatnonzero(valid_mask).tolist()]
+            if len(embedded) < len(chunks):
+                logger.warning(f"Failed to embed {len(chunks) - len(embedded)} chunks, skipping them")
+            
+            # Store chunks in SQL database; a single flush inserts the document and
+            # all chunks and assigns the IDs needed for the Milvus payload
+            db_chunks = [
+                KBChunk(document=document, chunk_index=i, text=chunk.text)
+                for i, chunk, _ in embedded
+            ]
+            db.add_all(db_chunks)
+            await db.flush()
+            stored_chunks = len(db_chunks)
             
-            for i, chunk in enumerate(chunks):
+            # Store embeddings in vector database (Milvus) in bulk, with fallback to SQL only
+            if db_chunks:
+                chunks_data = [
+                    {
+                        "chunk_id": db_chunk.id,
+                        "document_id": document.id,
+                        "chunk_index": i,
+                        "text": chunk.text,
+                        "char_count": len(chunk.text),
+                        "embedding": embedding,
+                        "metadata": {"filename": document.filename}
+                    }
+                    for db_chunk, (i, chunk, embedding) in zip(db_chunks, embedded)
+                ]
                 try:
-                    # Generate embedding with retries
-                    embedding = None
-                    max_embedding_retries = 3
-                    for attempt in range(max_embedding_retries):
-                        try:
-                            logger.info(f"Generating embedding for chunk {i}/{len(chunks)} (attempt {attempt + 1}/{max_embedding_retries})")
-                            embedding = await self.ollama_client.generate_embedding(
-                                chunk.text,
-                                embedding_model
-                            )
-                            logger.info(f"✅ Successfully generated embedding for chunk {i}")
-                            break
-                        except Exception as e:
-                            logger.error(f"❌ Embedding attempt {attempt + 1}/{max_embedding_retries} failed for chunk {i}: {e}")
-                            if attempt == max_embedding_retries - 1:
-                                raise Exception(f"Failed to generate embedding after {max_embedding_retries} attempts: {e}")
-                            await asyncio.sleep(2)  # Wait before retry
-                    
-                    if not embedding:
-                        raise Exception("No embedding generated")
-                    
-                    # Store chunk in SQL database
-                    db_chunk = KBChunk(
-                        document_id=document.id,
-                        chunk_index=i,
-                        text=chunk.text
-                        # Note: char_count is computed automatically
-                    )
-                    
-                    db.add(db_chunk)
-                    await db.flush()  # Get chunk ID
-                    
-                    # Store embedding in vector database (Milvus) with fallback
-                    vector_stored = False
-                    if self.vector_store._connected:
-                        try:
-                            await self.vector_store.add_embeddings(
-                                embeddings=[embedding],
-                                metadatas=[{
-                                    "document_id": document.id,
-                                    "chunk_id": db_chunk.id,
-                                    "chunk_index": i,
-                                    "filename": document.filename
-                                }],
-                                ids=[f"doc_{document.id}_chunk_{i}"]
-                            )
-                            vector_stored = True
-                            logger.debug(f"Stored embedding for chunk {i} in vector database")
-                        except Exception as e:
-                            logger.warning(f"Failed to store embedding for chunk {i} in vector database: {e}")
-                            # Continue processing without vector storage
-                    
-                    if not vector_stored:
-                        logger.info(f"Chunk {i} stored in SQL database only (vector storage skipped)")
-                    
-                    stored_chunks += 1
-                    
+                    for start in range(0, len(chunks_data), MILVUS_INSERT_BATCH_SIZE):
+                        milvus_ids = await self._store_embeddings(
+                            collection_id, chunks_data[start:start + MILVUS_INSERT_BATCH_SIZE]
+                        )
+                        for db_chunk, milvus_id in zip(db_chunks[start:], milvus_ids):
+                            db_chunk.milvus_id = milvus_id
+                    logger.info(f"Stored {len(chunks_data)} embeddings in vector database")
                 except Exception as e:
-                    logger.warning(f"Failed to process chunk {i}: {e}")
-                    continue
+                    logger.warning(f"Failed to store embeddings in vector database: {e}")
+                    logger.info("Chunks stored in SQL database only (vector storage skipped)")
+            else:
+                logger.info("Chunks stored in SQL database only (vector storage skipped)")
             
             # Step 7: Update document status
             document.status = DocumentStatus.COMPLETED
             document.chunk_count = stored_chunks
             
-            await db.commit()
+            if commit:
+                await db.commit()
             
             return {
                 "success": True,
@@ -219,6 +261,10 @@ class SimpleDocumentProcessor:
             import traceback
             logger.error(f"Traceback: {traceback.format_exc()}")
             
+            if not commit:
+                # The caller's savepoint rolls back this document's deletes and partial rows
+                raise
+            
             # Update document status to failed if created
             if 'document' in locals():
                 try:
@@ -235,25 +281,152 @@ class SimpleDocumentProcessor:
                 "filename": original_filename or file_path.name
             }
     
+    async def _remove_existing_document(self, db: AsyncSession, collection_id: int, existing_doc: KBDocument) -> None:
+        """Delete a duplicate document with its chunks and embeddings before it is replaced"""
+        logger.info(f"🔄 Found existing document {existing_doc.id} - replacing it with new version")
+
+        # Remove from vector store
+        try:
+            await self.vector_store.ensure_connected()
+            deleted_count = await self.vector_store.delete_document_embeddings(collection_id, existing_doc.id)
+            logger.info(f"🗑️ Removed {deleted_count} embeddings from vector store")
+        except Exception as e:
+            logger.warning(f"Failed to remove embeddings from vector store: {e}")
+        
+        # Delete chunks and the document from SQL with one statement each
+        chunks_result = await db.execute(
+            delete(KBChunk).where(KBChunk.document_id == existing_doc.id)
+        )
+        await db.execute(
+            delete(KBDocument).where(KBDocument.id == existing_doc.id)
+        )
+        db.expunge(existing_doc)
+        logger.info(f"🗑️ Removed existing document and {chunks_result.rowcount} chunks")
+    
+    async def _embed_chunks(self, texts: List[str], embedding_model: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Embed chunk texts in mini-batches, one Ollama request per batch, with at
+        most OLLAMA_EMBED_CONCURRENCY batches in flight. Batches use the client's
+        OLLAMA_EMBED_BATCH_SIZE, so the client sends each one without re-splitting.
+        Each distinct text is embedded once, so repeated boilerplate (headers,
+        footers, disclaimers) shares a vector. Failed chunks are retried with
+        jittered exponential backoff and flagged False in the validity mask if
+        they never succeed.
+        
+        Returns:
+            Tuple of (float32 array of shape [N, D], boolean validity mask of shape [N]),
+            the same layout as OllamaClient.generate_embeddings_array
+        """
+        # Position of each text in the unique list, used to expand unique vectors back in one gather
+        unique_index: Dict[str, int] = {}
+        inverse = np.fromiter(
+            (unique_index.setdefault(text, len(unique_index)) for text in texts),
+            dtype=np.intp, count=len(texts)
+        )
+        unique_texts = list(unique_index)
+        if len(unique_texts) < len(texts):
+            logger.info(f"♻️ {len(texts) - len(unique_texts)} duplicate chunks share an embedding")
+        
+        batch_size = self.ollama_client.embed_batch_size
+        semaphore = asyncio.Semaphore(self.ollama_client.embed_concurrency)
+        
+        async def _embed_batch(start: int) -> List[np.ndarray]:
+            async with semaphore:
+                return await _embed_batch_with_retry(start)
+        
+        async def _embed_batch_with_retry(start: int) -> List[np.ndarray]:
+            batch = unique_texts[start:start + batch_size]
+            embeddings = [_EMPTY_EMBEDDING] * len(batch)
+            try:
+                async for attempt in AsyncRetrying(
+                    wait=wait_exponential_jitter(initial=1, max=8),
+                    stop=stop_after_attempt(EMBED_MAX_RETRIES),
+                    before_sleep=_log_retry,
+                    reraise=True
+                ):
+                    with attempt:
+                        # Each attempt only re-sends the chunks still missing an embedding
+                        missing = [i for i, embedding in enumerate(embeddings) if len(embedding) == 0]
+                        retried = await self.ollama_client.generate_embeddings_batch(
+                            [batch[i] for i in missing], embedding_model
+                        )
+                        for i, embedding in zip(missing, retried):
+                            embeddings[i] = embedding
+                        still_missing = sum(1 for embedding in embeddings if len(embedding) == 0)
+                        if still_missing:
+                            raise MissingEmbeddingsError(f"{still_missing} embeddings missing in batch at chunk {start}")
+            except Exception as e:
+                logger.error(f"❌ Embedding batch at chunk {start} failed after {EMBED_MAX_RETRIES} attempts: {e}")
+            return embeddings
+        
+        batches = await asyncio.gather(*(
+            _embed_batch(start) for start in range(0, len(unique_texts), batch_size)
+        ))
+        unique_embeddings = [embedding for batch in batches for embedding in batch]
+        unique_valid = np.fromiter(
+            (len(embedding) > 0 for embedding in unique_embeddings), dtype=bool, count=len(unique_embeddings)
+        )
+        if not unique_valid.any():
+            logger.info(f"✅ Generated 0/{len(texts)} embeddings")
+            return np.zeros((len(texts), 0), dtype=np.float32), np.zeros(len(texts), dtype=bool)
+        
+        # Pack the vectors into one contiguous matrix; failed rows stay zero
+        dimension = len(unique_embeddings[int(np.argmax(unique_valid))])
+        unique_matrix = np.zeros((len(unique_embeddings), dimension), dtype=np.float32)
+        for j in np.flatnonzero(unique_valid):
+            unique_matrix[j] = unique_embeddings[j]
+        
+        embeddings, valid_mask = unique_matrix[inverse], unique_valid[inverse]
+        logger.info(f"✅ Generated {int(valid_mask.sum())}/{len(texts)} embeddings")
+        return embeddings, valid_mask
+    
+    @retry(
+        wait=wait_exponential_jitter(initial=1, max=8),
+        stop=stop_after_attempt(2),
+        retry=retry_if_exception_type(VectorStoreError),
+        before_sleep=_log_retry,
+        reraise=True
+    )
+    async def _store_embeddings(self, collection_id: int, chunks_data: List[Dict[str, Any]]) -> List[str]:
+        """Insert embeddings into Milvus, retrying once after a jittered backoff"""
+        await self.vector_store.ensure_connected()
+        return await self.vector_store.store_embeddings(collection_id, chunks_data)
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, creating it on first use"""
+        cls = type(self)
+        if cls._http_session is None or cls._http_session.closed:
+            cls._http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=32, keepalive_timeout=60)
+            )
+        return cls._http_session
+    
+    @classmethod
+    async def close(cls) -> None:
+        """Close the shared HTTP session (called on application shutdown)"""
+        if cls._http_session is not None:
+            await cls._http_session.close()
+            cls._http_session = None
+    
     async def _extract_text_with_tika(self, file_path: Path) -> str:
         """
         Extract text using Apache Tika (Open WebUI's proven approach).
         Much more reliable than individual library parsing.
         """
         try:
-            async with aiohttp.ClientSession() as session:
-                with open(file_path, 'rb') as file:
-                    async with session.put(
-                        f"{self.tika_url}/tika",
-                        data=file,
-                        headers={'Accept': 'text/plain'},
-                        timeout=aiohttp.ClientTimeout(total=30)
-                    ) as response:
-                        if response.status == 200:
-                            text = await response.text()
-                            return text
-                        else:
-                            raise Exception(f"Tika extraction failed: {response.status}")
+            session = await self._get_session()
+            # An async generator body makes aiohttp send the file with chunked transfer encoding
+            async with session.put(
+                f"{self.tika_url}/tika",
+                data=_file_iter(file_path),
+                headers=_TIKA_HEADERS,
+                timeout=_TIKA_TIMEOUT
+            ) as response:
+                if response.status == 200:
+                    text = await response.text()
+                    return text
+                else:
+                    raise Exception(f"Tika extraction failed: {response.status}")
         
         except Exception as e:
             logger.error(f"Tika extraction failed for {file_path}: {e}")
@@ -262,28 +435,25 @@ class SimpleDocumentProcessor:
     
     async def _calculate_file_hash(self, file_path: Path) -> str:
         """Calculate SHA256 hash for deduplication."""
-        hash_sha256 = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_sha256.update(chunk)
-        return hash_sha256.hexdigest()
+        # hashlib releases the GIL on large buffers, so the thread doesn't stall the event loop
+        return await asyncio.to_thread(_hash_file_sync, file_path)
     
     def _get_mime_type(self, file_path: Path) -> str:
         """Get MIME type from file extension."""
-        import mimetypes
-        mime_type, _ = mimetypes.guess_type(str(file_path))
-        return mime_type or "application/octet-stream"
+        return _mime_type_for_suffix(file_path.suffix.lower())
 
     async def process_multiple_documents(
         self,
         file_paths: List[Path],
         collection_id: int,
-        db: AsyncSession,
-        progress_callback: Optional[callable] = None
+        session_factory: Callable[[], AsyncSession],
+        progress_callback: Optional[callable] = None,
+        concurrency: int = DOCUMENT_CONCURRENCY
     ) -> Dict[str, Any]:
         """
-        Process multiple documents with simple progress tracking.
-        No complex job queues - just straightforward processing.
+        Process multiple documents concurrently with simple progress tracking.
+        Each document gets its own session from session_factory, since an
+        AsyncSession is not safe for concurrent use.
         """
         results = {
             "total": len(file_paths),
@@ -291,38 +461,87 @@ class SimpleDocumentProcessor:
             "failed": [],
             "skipped": []
         }
+        semaphore = asyncio.Semaphore(concurrency)
+        processed = 0
         
-        for i, file_path in enumerate(file_paths):
-            try:
-                result = await self.process_document(
-                    file_path, collection_id, db
-                )
-                
-                if result["success"]:
-                    if result.get("skipped"):
-                        results["skipped"].append(result)
-                    else:
-                        results["successful"].append(result)
+        # Resolve the embedding model once for the whole batch
+        async with session_factory() as db:
+            embedding_model = await self.ollama_client.get_user_embedding_model(db)
+        
+        async def _bounded(file_path: Path) -> None:
+            nonlocal processed
+            async with semaphore:
+                try:
+                    async with session_factory() as db:
+                        result = await self.process_document(
+                            file_path, collection_id, db, embedding_model=embedding_model
+                        )
+                except Exception as e:
+                    logger.error(f"Failed to process {file_path}: {e}")
+                    result = {
+                        "success": False,
+                        "error": str(e),
+                        "filename": file_path.name
+                    }
+            
+            if result["success"]:
+                if result.get("skipped"):
+                    results["skipped"].append(result)
                 else:
-                    results["failed"].append(result)
-                
-                # Simple progress callback
-                if progress_callback:
-                    await progress_callback({
-                        "processed": i + 1,
-                        "total": len(file_paths),
-                        "successful": len(results["successful"]),
-                        "failed": len(results["failed"]),
-                        "skipped": len(results["skipped"]),
-                        "percentage": ((i + 1) / len(file_paths)) * 100
-                    })
-                    
-            except Exception as e:
-                logger.error(f"Failed to process {file_path}: {e}")
-                results["failed"].append({
-                    "success": False,
-                    "error": str(e),
-                    "filename": file_path.name
+                    results["successful"].append(result)
+            else:
+                results["failed"].append(result)
+            processed += 1
+            
+            # Progress is queued so a slow callback never holds up processing
+            if progress_queue is not None:
+                progress_queue.put_nowait({
+                    "processed": processed,
+                    "total": len(file_paths),
+                    "successful": len(results["successful"]),
+                    "failed": len(results["failed"]),
+                    "skipped": len(results["skipped"]),
+                    "percentage": (processed / len(file_paths)) * 100
                 })
         
-        return results
\ No newline at end of file
+        progress_queue: Optional[asyncio.Queue] = None
+        progress_task = None
+        if progress_callback:
+            progress_queue = asyncio.Queue()
+            progress_task = asyncio.create_task(self._drain_progress(progress_queue, progress_callback))
+        
+        try:
+            async with asyncio.TaskGroup() as tg:
+                for file_path in file_paths:
+                    tg.create_task(_bounded(file_path))
+            if progress_queue is not None:
+                await progress_queue.join()
+        finally:
+            if progress_task is not None:
+                progress_task.cancel()
+        
+        return results
+    
+    @staticmethod
+    async def _drain_progress(queue: asyncio.Queue, progress_callback: Callable) -> None:
+        """
+        Forward queued progress events to the callback, at most one per
+        PROGRESS_MIN_INTERVAL. Events are cumulative snapshots, so a burst
+        collapses to its latest one; the final event is always delivered.
+        """
+        last_sent = 0.0
+        while True:
+            event = await queue.get()
+            delay = PROGRESS_MIN_INTERVAL - (time.monotonic() - last_sent)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            while not queue.empty():
+                queue.task_done()
+                event = queue.get_nowait()
+            try:
+                await progress_callback(event)
+            except Exception as e:
+                logger.warning(f"Progress callback failed: {e}")
+            finally:
+                last_sent = time.monotonic()
+                queue.task_done()
@@ -13,6 +13,9 @@ from enum import Enum
 
 from pydantic import BaseModel, Field
 
+from app.services.pydantic_agents import get_llm_semaphore
+from app.services.semantic_llm_cache import SemanticLLMCache
+
 logger = logging.getLogger(__name__)
 
 
@@ -405,10 +408,14 @@ class SimplifiedAgentOrchestrator:
         self.search_function = search_function
         self.llm_function = llm_function
         self.web_search_function = web_search_function
+        # Outline prompts carry the topic and research context, so a near-identical one can
+        # reuse a response. Section prompts share one template and differ only in a few
+        # short lines, and refinements must follow new feedback, so they always call the LLM.
+        self.semantic_llm_cache = SemanticLLMCache(llm_function)
         
         # Initialize agents
         self.research_agent = ResearchAgent(search_function, llm_function, web_search_function)
-        self.outline_agent = OutlineAgent(llm_function)
+        self.outline_agent = OutlineAgent(self.semantic_llm_cache)
         self.section_writer_agent = SectionWriterAgent(llm_function)
         self.refinement_agent = RefinementAgent(llm_function)
         
@@ -575,6 +582,91 @@ class SimplifiedAgentOrchestrator:
             "next_action": "refine_section_or_move_on"
         }
     
+    async def generate_all_sections(self, session_id: str) -> Dict[str, Any]:
+        """
+        Generate every outlined section concurrently.
+        Sections are independent LLM calls, so wall time approaches the slowest
+        section instead of the sum; the shared LLM semaphore bounds how many run
+        at once. generate_section stays the step-by-step path for interactive refinement.
+        """
+        if session_id not in self.active_generations:
+            raise ValueError(f"Session {session_id} not found")
+        
+        state = self.active_generations[session_id]
+        
+        if not state.outline or not state.outline.sections:
+            raise ValueError("No outline available for section generation")
+        
+        # Get research data
+        research_data = {}
+        for entry in state.generation_history:
+            if entry["phase"] == GenerationPhase.RESEARCH:
+                research_data = entry["result"]
+                break
+        
+        semaphore = get_llm_semaphore()
+        
+        async def _write(section_data: Dict[str, Any]) -> SectionContent:
+            async with semaphore:
+                section_content = await self.section_writer_agent.write_section(
+                    section_data,
+                    state.topic,
+                    research_data
+                )
+            # Stored as each section finishes, so one failure doesn't lose the others
+            state.sections[section_content.section_id] = section_content
+            return section_content
+        
+        logger.info(f"✍️ Generating {len(state.outline.sections)} sections concurrently")
+        results = await asyncio.gather(
+            *(_write(section) for section in state.outline.sections),
+            return_exceptions=True
+        )
+        
+        failed_sections = [
+            {"section_id": section.get("id"), "error": str(result)}
+            for section, result in zip(state.outline.sections, results)
+            if isinstance(result, BaseException)
+        ]
+        
+        if failed_sections:
+            # Resume the sequential workflow at the first section that still needs content
+            first_failed = failed_sections[0]["section_id"]
+            state.current_section_id = first_failed
+            if first_failed in state.section_order:
+                state.current_section_index = state.section_order.index(first_failed)
+            state.section_refinement_mode = False
+            
+            return {
+                "session_id": session_id,
+                "phase": GenerationPhase.SECTION_GENERATION,
+                "status": "partial",
+                "sections": {section_id: section.dict() for section_id, section in state.sections.items()},
+                "failed_sections": failed_sections,
+                "next_section_id": first_failed,
+                "message": f"{len(failed_sections)} sections failed; generate them individually to continue",
+                "action_needed": "generate_next_section"
+            }
+        
+        # Every section has content, so move straight to final review
+        state.current_section_index = len(state.section_order)
+        state.section_refinement_mode = False
+        final_article = await self._compile_final_article(state)
+        state.final_article = final_article
+        state.current_phase = GenerationPhase.FINAL_REVIEW
+        state.final_refinement_mode = True
+        
+        return {
+            "session_id": session_id,
+            "phase": GenerationPhase.FINAL_REVIEW,
+            "status": "all_sections_complete",
+            "sections": {section_id: section.dict() for section_id, section in state.sections.items()},
+            "final_article": final_article,
+            "total_words": sum(section.word_count for section in state.sections.values()),
+            "message": "All sections generated. Review the final article.",
+            "action_needed": "final_review"
+        }
+    
     async def process_section_feedback(
         self,
         session_id: str,
@@ -6,7 +6,7 @@ import re
 import hashlib
 import json
 import csv
-from typing import List, Tuple, Optional
+from typing import Iterator, List, Tuple, Optional
 from pathlib import Path
 from datetime import datetime
 import asyncio
@@ -26,6 +26,9 @@ from striprtf.striprtf import rtf_to_text
 
 logger = logging.getLogger(__name__)
 
+_WHITESPACE_RE = re.compile(r'\s+')
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+
 
 class TextChunk:
     """Represents a chunk of text with metadata"""
@@ -475,35 +478,33 @@ You may want to add manual notes or transcription for this audio content.
     
     def create_chunks(self, text: str) -> List[TextChunk]:
         """Split text into overlapping chunks for better context preservation"""
+        return list(self.iter_chunks(text))
+    
+    def iter_chunks(self, text: str) -> Iterator[TextChunk]:
+        """Lazily yield overlapping chunks so callers only hold the chunks they are working on"""
         if not text.strip():
-            return []
+            return
         
         # Clean and normalize text
         cleaned_text = self._clean_text(text)
+        del text
         
-        # Split into sentences for better chunk boundaries
-        sentences = self._split_into_sentences(cleaned_text)
-        
-        if not sentences:
-            return []
-        
-        chunks = []
         current_chunk = ""
         current_start = 0
         chunk_index = 0
         
-        for i, sentence in enumerate(sentences):
+        # Sentences are split off one at a time, so only the cleaned text is held
+        for sentence in self._iter_sentences(cleaned_text):
             # Check if adding this sentence would exceed chunk size
             if len(current_chunk) + len(sentence) > self.max_chunk_size and current_chunk:
                 # Create chunk from current content
-                chunk = TextChunk(
+                yield TextChunk(
                     text=current_chunk.strip(),
                     chunk_index=chunk_index,
                     char_count=len(current_chunk.strip()),
                     start_pos=current_start,
                     end_pos=current_start + len(current_chunk)
                 )
-                chunks.append(chunk)
                 chunk_index += 1
                 
                 # Start new chunk with overlap
@@ -515,27 +516,18 @@ You may want to add manual notes or transcription for this audio content.
         
         # Add final chunk if there's remaining content
         if current_chunk.strip():
-            chunk = TextChunk(
+            yield TextChunk(
                 text=current_chunk.strip(),
                 chunk_index=chunk_index,
                 char_count=len(current_chunk.strip()),
                 start_pos=current_start,
                 end_pos=current_start + len(current_chunk)
             )
-            chunks.append(chunk)
-        
-        return chunks
     
     def _clean_text(self, text: str) -> str:
         """Clean and normalize text content"""
-        # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Remove page breaks and form feeds
-        text = re.sub(r'[\f\r]+', '\n', text)
-        
-        # Normalize line breaks
-        text = re.sub(r'\n+', '\n', text)
+        # Collapse all whitespace, including line breaks and form feeds, to single spaces
+        text = _WHITESPACE_RE.sub(' ', text)
         
         # Remove leading/trailing whitespace
         text = text.strip()
@@ -544,13 +536,20 @@ You may want to add manual notes or transcription for this audio content.
     
     def _split_into_sentences(self, text: str) -> List[str]:
         """Split text into sentences for better chunk boundaries"""
+        return list(self._iter_sentences(text))
+    
+    def _iter_sentences(self, text: str) -> Iterator[str]:
+        """Lazily yield sentences, skipping very short segments"""
         # Simple sentence splitting - can be enhanced with spaCy or NLTK
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        
-        # Filter out very short segments
-        sentences = [s.strip() + ' ' for s in sentences if len(s.strip()) > 10]
-        
-        return sentences
+        start = 0
+        for match in _SENTENCE_END_RE.finditer(text):
+            sentence = text[start:match.start()].strip()
+            if len(sentence) > 10:
+                yield sentence + ' '
+            start = match.end()
+        sentence = text[start:].strip()
+        if len(sentence) > 10:
+            yield sentence + ' '
     
     def _get_overlap_text(self, text: str, overlap_size: int) -> str:
         """Get the last N characters for overlap"""
@@ -617,6 +616,36 @@ class DocumentAnalyzer:
         except Exception as e:
             logger.error(f"Document analysis failed for {file_path}: {e}")
             raise
+    
+    async def stream_document(self, file_path: str, mime_type: Optional[str] = None) -> Tuple[int, Iterator[TextChunk]]:
+        """
+        Analyze a document without keeping the full text or chunk list alive
+        
+        Returns:
+            Tuple of (full_text_length, chunk_iterator)
+        """
+        try:
+            validation = await self.processor.validate_file(file_path)
+            
+            if not validation['valid']:
+                error_msg = f"File validation failed: {', '.join(validation['errors'])}"
+                logger.error(error_msg)
+                raise ValueError(error_msg)
+            
+            for warning in validation['warnings']:
+                logger.warning(warning)
+            
+            logger.info(f"Extracting text from {file_path}")
+            full_text = await self.processor.extract_text_from_file(file_path, mime_type)
+            
+            if not full_text.strip():
+                raise ValueError("No text content found in document")
+            
+            return len(full_text), self.processor.iter_chunks(full_text)
+            
+        except Exception as e:
+            logger.error(f"Document analysis failed for {file_path}: {e}")
+            raise
 
 
 # Global analyzer instance
@@ -5,6 +5,8 @@ Milvus vector database integration for storing and searching embeddings
 import logging
 from typing import List, Optional, Dict, Any, Tuple
 import json
+
+import numpy as np
 from pymilvus import (
     connections, 
     Collection, 
@@ -47,7 +49,21 @@ class MilvusVectorStore:
         except Exception as e:
             logger.error(f"Failed to connect to Milvus: {e}")
             raise VectorStoreError(f"Milvus connection failed: {e}")
-    
+
+    async def ensure_connected(self) -> None:
+        """Connect to Milvus only if no connection has been established yet"""
+        if self._connected:
+            return
+        await self.connect()
+
+    async def disconnect(self) -> None:
+        """Close the Milvus connection"""
+        if not self._connected:
+            return
+        connections.disconnect(self.connection_name)
+        self._connected = False
+        logger.info("Disconnected from Milvus")
+
     def _ensure_connected(self) -> None:
         """Ensure we're connected to Milvus"""
         if not self._connected:
@@ -152,7 +168,7 @@ class MilvusVectorStore:
                 metadatas.append(json.dumps(chunk_data.get("metadata", {})))
                 embeddings.append(chunk_data["embedding"])
             
-            # Insert data
+            # Insert data; vectors go as one contiguous float32 matrix instead of N Python lists
             entities = [
                 chunk_ids,
                 document_ids,
@@ -161,7 +177,7 @@ class MilvusVectorStore:
                 texts,
                 char_counts,
                 metadatas,
-                embeddings
+                np.asarray(embeddings, dtype=np.float32)
             ]
             
             insert_result = collection.insert(entities)
@@ -194,6 +210,22 @@ class MilvusVectorStore:
         Returns:
             List of dicts with keys: milvus_id, chunk_id, document_id, text, score, metadata
         """
+        results = await self.search_similar_batch(kb_collection_id, [query_embedding], limit, score_threshold)
+        return results[0] if results else []
+    
+    async def search_similar_batch(
+        self,
+        kb_collection_id: int,
+        query_embeddings: List[List[float]],
+        limit: int = 10,
+        score_threshold: float = 0.2
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search for several query embeddings in a single Milvus request
+        
+        Returns:
+            One list of matches per query embedding, in input order
+        """
         self._ensure_connected()
         
         collection_name = self.get_collection_name(kb_collection_id)
@@ -201,7 +233,7 @@ class MilvusVectorStore:
         try:
             if not utility.has_collection(collection_name):
                 logger.warning(f"Collection {collection_name} does not exist")
-                return []
+                return [[] for _ in query_embeddings]
             
             collection = Collection(collection_name)
             
@@ -216,7 +248,7 @@ class MilvusVectorStore:
             
             # Perform search
             results = collection.search(
-                data=[query_embedding],
+                data=list(query_embeddings),
                 anns_field="embedding",
                 param=search_params,
                 limit=limit,
@@ -224,8 +256,9 @@ class MilvusVectorStore:
             )
             
             # Process results
-            similar_chunks = []
+            all_matches = []
             for hits in results:
+                similar_chunks = []
                 for hit in hits:
                     if hit.score >= score_threshold:
                         metadata = {}
@@ -244,9 +277,13 @@ class MilvusVectorStore:
                             "score": float(hit.score),
                             "metadata": metadata
                         })
+                all_matches.append(similar_chunks)
             
-            logger.info(f"Found {len(similar_chunks)} similar chunks (threshold: {score_threshold})")
-            return similar_chunks
+            logger.info(
+                f"Found {sum(len(m) for m in all_matches)} similar chunks for "
+                f"{len(all_matches)} queries (threshold: {score_threshold})"
+            )
+            return all_matches
             
         except Exception as e:
             logger.error(f"Failed to search embeddings: {e}")
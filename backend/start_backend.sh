@@ -268,12 +268,12 @@ log_info ""
 # Start server with proper error handling
 if [ "$1" = "--background" ] || [ "$1" = "-d" ]; then
     log_info "Starting server in background mode..."
-    nohup python -m uvicorn app.main:app --host "$HOST" --port "$PORT" --reload > "$LOG_FILE" 2>&1 &
+    nohup python -m uvicorn app.main:app --host "$HOST" --port "$PORT" --loop uvloop --reload > "$LOG_FILE" 2>&1 &
     SERVER_PID=$!
     echo $SERVER_PID > "$SCRIPT_DIR/server.pid"
     log_info "✓ Server started in background (PID: $SERVER_PID)"
     log_info "To stop: kill $SERVER_PID or run: pkill -f uvicorn"
 else
     log_info "Starting server in foreground mode..."
-    exec python -m uvicorn app.main:app --host "$HOST" --port "$PORT" --reload 2>&1 | tee -a "$LOG_FILE"
+    exec python -m uvicorn app.main:app --host "$HOST" --port "$PORT" --loop uvloop --reload 2>&1 | tee -a "$LOG_FILE"
 fi
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""
+Tests for the semantic LLM cache and its use in SimplifiedAgentOrchestrator
+"""
+
+import numpy as np
+import pytest
+
+from app.services.semantic_llm_cache import SemanticCache, SemanticLLMCache
+from app.services.simplified_enhanced_agents import SimplifiedAgentOrchestrator
+
+
+class FakeLLM:
+    """Records prompts and answers each call with a distinct response"""
+
+    def __init__(self):
+        self.prompts = []
+
+    async def __call__(self, prompt: str, max_tokens: int = 1000, is_refinement: bool = False) -> str:
+        self.prompts.append(prompt)
+        return f"response {len(self.prompts)}"
+
+
+async def same_embedding(text: str) -> np.ndarray:
+    """Worst case: every prompt embeds identically, so any cached prompt matches"""
+    return np.ones(8, dtype=np.float32)
+
+
+async def failing_embedding(text: str) -> np.ndarray:
+    raise RuntimeError("embedding model unavailable")
+
+
+async def no_search(collection_id: int, query: str, limit: int = 10):
+    return {"matches": []}
+
+
+def test_semantic_cache_matches_above_threshold_only():
+    cache = SemanticCache(threshold=0.87, maxsize=4)
+    cache.store(SemanticCache.normalize([1.0, 0.0]), "a")
+
+    assert cache.lookup(SemanticCache.normalize([1.0, 0.1])) == "a"
+    assert cache.lookup(SemanticCache.normalize([1.0, 1.0])) is None
+
+
+def test_semantic_cache_evicts_least_recently_used():
+    cache = SemanticCache(threshold=0.99, maxsize=2)
+    a, b, c = (SemanticCache.normalize(v) for v in ([1, 0, 0], [0, 1, 0], [0, 0, 1]))
+    cache.store(a, "a")
+    cache.store(b, "b")
+    cache.lookup(a)
+    cache.store(c, "c")
+
+    assert cache.lookup(a) == "a"
+    assert cache.lookup(b) is None
+    assert cache.lookup(c) == "c"
+
+
+@pytest.mark.asyncio
+async def test_llm_cache_reuses_response_for_same_max_tokens():
+    llm = FakeLLM()
+    cached_llm = SemanticLLMCache(llm, same_embedding, threshold=0.87, max_entries=8)
+
+    first = await cached_llm("outline about topic", max_tokens=800)
+    second = await cached_llm("outline about the topic", max_tokens=800)
+    other_length = await cached_llm("outline about the topic", max_tokens=700)
+
+    assert first == second
+    assert other_length != first
+    assert len(llm.prompts) == 2
+    assert cached_llm.get_stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_llm_cache_bypassed_for_refinement_and_embedding_failure():
+    llm = FakeLLM()
+    cached_llm = SemanticLLMCache(llm, same_embedding, threshold=0.87, max_entries=8)
+    await cached_llm("refine this", max_tokens=800, is_refinement=True)
+    await cached_llm("refine this", max_tokens=800, is_refinement=True)
+    assert len(llm.prompts) == 2
+
+    uncached_llm = SemanticLLMCache(llm, failing_embedding, threshold=0.87, max_entries=8)
+    await uncached_llm("prompt", max_tokens=800)
+    await uncached_llm("prompt", max_tokens=800)
+    assert len(llm.prompts) == 4
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_sections_never_share_cached_content():
+    llm = FakeLLM()
+    orchestrator = SimplifiedAgentOrchestrator(collection_id=1, search_function=no_search, llm_function=llm)
+    orchestrator.semantic_llm_cache.embed_function = same_embedding
+    research = {"local_results": [{"text": "shared research", "source": "doc"}]}
+
+    intro = await orchestrator.section_writer_agent.write_section(
+        {"id": "section_1", "title": "Introduction", "description": "Overview", "key_points": ["scope"]},
+        "Solar power", research
+    )
+    costs = await orchestrator.section_writer_agent.write_section(
+        {"id": "section_2", "title": "Costs", "description": "Pricing", "key_points": ["panels"]},
+        "Solar power", research
+    )
+
+    assert len(llm.prompts) == 2
+    assert intro.content != costs.content
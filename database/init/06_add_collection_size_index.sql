@@ -0,0 +1,14 @@
+-- Add a (collection_id, size_bytes) index to kb_documents if it doesn't exist
+-- Uploads check for a same-size document before hashing, so this lookup runs for every file
+
+SET @sql = NULL;
+SELECT CONCAT('ALTER TABLE kb_documents ADD INDEX idx_collection_size (collection_id, size_bytes);') INTO @sql
+FROM information_schema.statistics
+WHERE table_schema = 'long_article_writer'
+  AND table_name = 'kb_documents'
+  AND index_name = 'idx_collection_size'
+HAVING COUNT(*) = 0;
+
+PREPARE stmt FROM COALESCE(@sql, 'SELECT "idx_collection_size index already exists" as message;');
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;